@@ -0,0 +1,198 @@
+import ipaddress
+import os
+import threading
+import time
+from contextlib import contextmanager
+from subnet_index import SubnetIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Fold the journal into the snapshot once it holds this many entries
+SNAPSHOT_EVERY = 500
+
+
+# Exclusive lock shared by every process that writes to the same region files
+@contextmanager
+def file_lock(path: str):
+    with open(path, "a+b") as handle:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _parse_lines(data: bytes) -> list[ipaddress.IPv4Network]:
+    subnets = []
+    for line in data.decode().splitlines():
+        try:
+            subnets.append(ipaddress.IPv4Network(line.strip()))
+        except ValueError:
+            continue
+    return subnets
+
+
+def _file_signature(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+# Allocation record for one region.
+# <region>_allocated.txt is the compacted snapshot (same one-subnet-per-line
+# format as before) and <region>_allocated.journal takes every new
+# allocation as an fsynced append. Each process keeps the subnets and a
+# SubnetIndex in memory and only reads the journal bytes it has not seen yet.
+class AllocationStore:
+    def __init__(self, folder: str, region: str, base_network: ipaddress.IPv4Network,
+                 snapshot_every: int = SNAPSHOT_EVERY):
+        os.makedirs(folder, exist_ok=True)
+        self.base_network = base_network
+        self.snapshot_path = os.path.join(folder, f"{region}_allocated.txt")
+        self.journal_path = os.path.join(folder, f"{region}_allocated.journal")
+        self.lock_path = os.path.join(folder, f"{region}_allocated.lock")
+        self.snapshot_every = snapshot_every
+        self._mutex = threading.Lock()
+        with self._locked():
+            self._reload()
+
+    @contextmanager
+    def _locked(self):
+        with self._mutex, file_lock(self.lock_path):
+            yield
+
+    # Rebuild the in-memory copy from the snapshot plus the whole journal
+    def _reload(self):
+        self._subnets = []
+        self._seen = set()
+        self.index = SubnetIndex(self.base_network)
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._snapshot_signature = _file_signature(self.snapshot_path)
+        if self._snapshot_signature:
+            with open(self.snapshot_path, "rb") as file:
+                subnets = _parse_lines(file.read())
+            self._remember(subnets)
+            self.index = SubnetIndex(self.base_network, self._subnets)
+        self._read_journal_tail()
+
+    def _remember(self, subnets):
+        added = []
+        for subnet in subnets:
+            if subnet not in self._seen:
+                self._seen.add(subnet)
+                self._subnets.append(subnet)
+                added.append(subnet)
+        return added
+
+    # Apply journal entries written since our last read, by us or any other process
+    def _read_journal_tail(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb") as file:
+            file.seek(self._journal_offset)
+            data = file.read()
+        # A line without its newline is a torn write and is never counted
+        complete = data.rfind(b"\n") + 1
+        if not complete:
+            return
+        subnets = _parse_lines(data[:complete])
+        self._journal_offset += complete
+        self._journal_entries += len(subnets)
+        for subnet in self._remember(subnets):
+            self.index.reserve(subnet)
+
+    def _sync(self):
+        journal_size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        if (_file_signature(self.snapshot_path) != self._snapshot_signature
+                or journal_size < self._journal_offset):
+            self._reload()
+        else:
+            self._read_journal_tail()
+
+    # Durably append subnets to the journal; caller holds the lock and has synced
+    def _append(self, subnets):
+        with open(self.journal_path, "ab") as file:
+            file.truncate(self._journal_offset)
+            file.write("".join(f"{subnet}\n" for subnet in subnets).encode())
+            file.flush()
+            os.fsync(file.fileno())
+        self._read_journal_tail()
+        if self._journal_entries >= self.snapshot_every:
+            self._compact()
+
+    # Rewrite the snapshot with every allocation, then empty the journal.
+    # A crash in between only leaves duplicates, which loading ignores.
+    def _compact(self):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write("".join(f"{subnet}\n" for subnet in self._subnets))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        with open(self.journal_path, "r+b") as file:
+            file.truncate(0)
+            file.flush()
+            os.fsync(file.fileno())
+        self._snapshot_signature = _file_signature(self.snapshot_path)
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    # All allocated subnets in allocation order
+    def allocated(self) -> list[ipaddress.IPv4Network]:
+        with self._locked():
+            self._sync()
+            return list(self._subnets)
+
+    # Point-in-time copy of the free-space index for reporting
+    def free_space(self) -> SubnetIndex:
+        with self._locked():
+            self._sync()
+            return self.index.copy()
+
+    # Find and record the next free /prefix while holding the region lock,
+    # so two sessions or processes can never be handed the same subnet
+    def allocate(self, prefix: int, strategy: str = "first") -> ipaddress.IPv4Network | None:
+        with self._locked():
+            self._sync()
+            subnet = self.index.find(prefix, strategy)
+            if subnet is not None:
+                self._append([subnet])
+            return subnet
+
+    # Allocate a whole batch of prefixes in one locked pass and one journal write.
+    # Largest blocks are placed first so small ones fill the gaps they leave.
+    # Returns subnets in request order, or None (and records nothing) if any
+    # prefix does not fit.
+    def allocate_many(self, prefixes: list[int], strategy: str = "first") -> list[ipaddress.IPv4Network] | None:
+        with self._locked():
+            self._sync()
+            index = self.index.copy()
+            subnets = [None] * len(prefixes)
+            for position in sorted(range(len(prefixes)), key=lambda i: prefixes[i]):
+                subnet = index.allocate(prefixes[position], strategy)
+                if subnet is None:
+                    return None
+                subnets[position] = subnet
+            if subnets:
+                self._append(subnets)
+            return subnets
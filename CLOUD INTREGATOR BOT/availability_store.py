@@ -0,0 +1,118 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from azure_fanout import fan_out
+from sqlite_store import connect, create_store
+from vm_availability import to_utc
+
+STORE_PATH = "metrics_data/availability.db"
+
+# A day is only marked complete once this long after its end, so late
+# metric ingestion still gets picked up on the next report
+SETTLE_DELAY = timedelta(hours=3)
+
+# Azure Monitor keeps platform metrics for 93 days; older days are served from the store only
+API_RETENTION = timedelta(days=93)
+
+HOUR_NS = 3600 * 10**9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS availability (
+    resource_id TEXT NOT NULL,
+    hour INTEGER NOT NULL,          -- hours since the Unix epoch, UTC
+    value REAL NOT NULL,
+    PRIMARY KEY (resource_id, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fetched_days (
+    resource_id TEXT NOT NULL,
+    day INTEGER NOT NULL,           -- days since the Unix epoch, UTC
+    complete INTEGER NOT NULL,
+    PRIMARY KEY (resource_id, day)
+) WITHOUT ROWID;
+"""
+
+
+def _epoch_hour(stamp):
+    return to_utc(stamp).value // HOUR_NS
+
+
+def _day_start(day):
+    return pd.Timestamp(day * 24 * HOUR_NS, tz="UTC")
+
+
+# Local history of hourly VmAvailabilityMetric values.
+# Rows are clustered by VM and hour (the primary key), and fetched_days
+# records which VM/day partitions are already complete, so a report only
+# asks Azure for the days it has not stored yet.
+class AvailabilityStore:
+    def __init__(self, path=STORE_PATH):
+        create_store(path)
+        self.path = path
+        with connect(path) as conn:
+            conn.executescript(SCHEMA)
+
+    # Contiguous (start, end) spans of days in [start, end) not yet complete for a VM.
+    # Spans start on a day boundary, so the first day is fetched whole and can be marked complete.
+    def missing_spans(self, resource_id, start, end):
+        first_day = _epoch_hour(start) // 24
+        last_day = (_epoch_hour(end) - 1) // 24
+        oldest_fetchable = _epoch_hour(pd.Timestamp.now(tz="UTC") - API_RETENTION) // 24
+        with connect(self.path) as conn:
+            complete = {day for (day,) in conn.execute(
+                "SELECT day FROM fetched_days WHERE resource_id = ? AND day BETWEEN ? AND ? AND complete = 1",
+                (resource_id, first_day, last_day))}
+
+        spans, span_start = [], None
+        for day in range(max(first_day, oldest_fetchable), last_day + 2):
+            missing = day <= last_day and day not in complete
+            if missing and span_start is None:
+                span_start = day
+            elif not missing and span_start is not None:
+                spans.append((span_start, day))
+                span_start = None
+        return [(_day_start(a), min(_day_start(b), to_utc(end))) for a, b in spans]
+
+    # Store fetched points and mark the span's days as fetched. Only days the
+    # span covers whole (and that have settled) are marked complete; a
+    # partly fetched day is fetched again by the next report that needs it.
+    def save(self, resource_id, series, span_start, span_end, fetched_at):
+        hours = (series.index.floor("h").as_unit("ns").asi8 // HOUR_NS).tolist() if len(series) else []
+        rows = [(resource_id, hour, float(value)) for hour, value in zip(hours, series.to_numpy())]
+        settled_day = (_epoch_hour(fetched_at - SETTLE_DELAY) // 24) - 1
+        first_hour, end_hour = _epoch_hour(span_start), _epoch_hour(span_end)
+        days = range(first_hour // 24, (end_hour - 1) // 24 + 1)
+        with connect(self.path) as conn:
+            conn.executemany("INSERT OR REPLACE INTO availability VALUES (?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO fetched_days VALUES (?, ?, ?)", [
+                (resource_id, day, int(day <= settled_day and first_hour <= day * 24 and (day + 1) * 24 <= end_hour))
+                for day in days])
+
+    # Stored hourly series in [start, end) for each VM
+    def load(self, resource_ids, start, end):
+        first, last = _epoch_hour(start), _epoch_hour(end)
+        series = {}
+        with connect(self.path) as conn:
+            for resource_id in resource_ids:
+                rows = conn.execute(
+                    "SELECT hour, value FROM availability WHERE resource_id = ? AND hour >= ? AND hour < ? ORDER BY hour",
+                    (resource_id, first, last)).fetchall()
+                data = np.asarray(rows, dtype=np.float64).reshape(-1, 2)
+                index = pd.DatetimeIndex(data[:, 0].astype(np.int64) * HOUR_NS, tz="UTC")
+                series[resource_id] = pd.Series(data[:, 1], index=index)
+        return series
+
+    # Fetch only the missing days for every VM (concurrently), then answer from the store.
+    # fetch(resource_id, start, end) returns an hourly Series.
+    def sync(self, resource_ids, start, end, fetch, on_progress=None):
+        def fill(resource_id):
+            for span_start, span_end in self.missing_spans(resource_id, start, end):
+                fetched_at = pd.Timestamp.now(tz="UTC")
+                self.save(resource_id, fetch(resource_id, span_start, span_end), span_start, span_end, fetched_at)
+
+        errors = {}
+        for done, (resource_id, _, error) in enumerate(fan_out(fill, resource_ids), 1):
+            if error:
+                errors[resource_id] = error
+            if on_progress:
+                on_progress(done, len(resource_ids))
+        return self.load(resource_ids, start, end), errors
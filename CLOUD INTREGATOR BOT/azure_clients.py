@@ -0,0 +1,82 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.pipeline.transport import RequestsTransport
+from azure.identity import DefaultAzureCredential
+
+# Keep-alive connections per host shared by every client in the process
+HTTP_POOL_SIZE = 64
+
+# Refresh a cached token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 300
+
+_lock = threading.Lock()
+_credential = None
+_transport = None
+_clients = {}
+
+
+# Wraps a credential so each token is requested once and reused until close
+# to expiry, whichever credential in the DefaultAzureCredential chain
+# answered (the Azure CLI one, for example, spawns a process per call).
+class CachedTokenCredential:
+    def __init__(self, credential):
+        self._credential = credential
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        key = (scopes, kwargs.get("claims"), kwargs.get("tenant_id"))
+        token = self._tokens.get(key)
+        if token and token.expires_on - TOKEN_REFRESH_MARGIN > time.time():
+            return token
+        with self._lock:
+            token = self._tokens.get(key)
+            if not token or token.expires_on - TOKEN_REFRESH_MARGIN <= time.time():
+                token = self._credential.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+            return token
+
+    def close(self):
+        self._credential.close()
+
+
+# Process-wide credential shared by all pages and sessions
+def get_credential():
+    global _credential
+    with _lock:
+        if _credential is None:
+            _credential = CachedTokenCredential(DefaultAzureCredential())
+        return _credential
+
+
+# One requests session with a large connection pool, so every client reuses
+# warm TLS connections to management.azure.com
+def _get_transport():
+    global _transport
+    if _transport is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        _transport = RequestsTransport(session=session, session_owner=False)
+    return _transport
+
+
+# Pooled management client, one per (client class, subscription).
+# Use as get_client(ComputeManagementClient, subscription_id) or
+# get_client(SubscriptionClient) for tenant-level clients.
+def get_client(client_class, subscription_id=None):
+    key = (client_class, subscription_id)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    credential = get_credential()
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            args = (credential, subscription_id) if subscription_id else (credential,)
+            client = client_class(*args, transport=_get_transport())
+            _clients[key] = client
+        return client
@@ -0,0 +1,82 @@
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from azure.core.exceptions import HttpResponseError
+
+# Concurrent Azure calls per fan-out, how long a single item may run and
+# how long the whole fan-out may take, queued items included
+MAX_WORKERS = 16
+ITEM_TIMEOUT = 120
+FAN_OUT_TIMEOUT = 600
+
+# How often a throttled (HTTP 429) call is retried before giving up
+MAX_THROTTLE_RETRIES = 6
+MAX_BACKOFF = 60
+
+
+# Seconds to wait after a 429: the Retry-After header if ARM sent one,
+# otherwise exponential backoff with jitter
+def throttle_delay(error: HttpResponseError, attempt: int) -> float:
+    response = getattr(error, "response", None)
+    header = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return min(float(header), MAX_BACKOFF)
+    except (TypeError, ValueError):
+        return min(2 ** attempt, MAX_BACKOFF) * (0.5 + random.random() / 2)
+
+
+# Call fn, sleeping and retrying while Azure answers 429 Too Many Requests
+def call_with_backoff(fn, *args, max_retries: int = MAX_THROTTLE_RETRIES, **kwargs):
+    for attempt in range(max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except HttpResponseError as e:
+            if e.status_code != 429 or attempt == max_retries:
+                raise
+            time.sleep(throttle_delay(e, attempt))
+
+
+# Run fn(item) for every item on a bounded thread pool and yield
+# (item, result, error) in completion order, so callers can show results
+# while the slower items are still running. An item that runs longer than
+# timeout seconds is reported with a TimeoutError and its result dropped.
+# A hung call keeps its worker thread, so the fan-out as a whole also stops
+# after deadline seconds: items still queued are cancelled and every
+# unfinished item is reported with a TimeoutError.
+def fan_out(fn, items, max_workers: int = MAX_WORKERS, timeout: float = ITEM_TIMEOUT,
+            deadline: float = FAN_OUT_TIMEOUT):
+    items = list(items)
+    if not items:
+        return
+    started = {}
+    give_up_at = time.monotonic() + deadline
+
+    def run(position):
+        started[position] = time.monotonic()
+        return call_with_backoff(fn, items[position])
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    try:
+        pending = {executor.submit(run, position): position for position in range(len(items))}
+        while pending:
+            done, _ = wait(pending, timeout=max(0, min(0.5, give_up_at - time.monotonic())),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                position = pending.pop(future)
+                error = future.exception()
+                yield items[position], (None if error else future.result()), error
+
+            now = time.monotonic()
+            if now >= give_up_at:
+                for future, position in list(pending.items()):
+                    future.cancel()
+                    yield items[position], None, TimeoutError(f"Not finished within {deadline:.0f}s")
+                pending.clear()
+                break
+            for future, position in list(pending.items()):
+                if position in started and now - started[position] > timeout:
+                    del pending[future]
+                    yield items[position], None, TimeoutError(f"No response after {timeout:.0f}s")
+    finally:
+        # Stuck calls keep their thread until the SDK gives up, but nobody waits for them
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,175 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from azure.mgmt.compute import ComputeManagementClient
+from azure.mgmt.resource import ResourceManagementClient
+from azure.mgmt.resource.subscriptions import SubscriptionClient
+from azure_clients import get_client
+from azure_fanout import MAX_WORKERS, call_with_backoff
+
+# How long a listing is served before the background thread refreshes it
+HIERARCHY_TTL = 10 * 60
+
+# How often the background thread looks for stale listings
+REFRESH_INTERVAL = 60
+
+# Listings nobody has read for this long are dropped
+IDLE_EXPIRY = 60 * 60
+
+# How long a page waits for a listing it has never seen before
+LOAD_TIMEOUT = 60
+
+TENANTS = ("tenants",)
+SUBSCRIPTIONS = ("subscriptions",)
+
+_lock = threading.Lock()
+_hierarchy = None
+
+
+def _by_name(names):
+    return sorted(names, key=str.lower)
+
+
+# Fetch one listing from Azure; keys are TENANTS, SUBSCRIPTIONS,
+# ("resource_groups", subscription_id) or ("vms", subscription_id, resource_group)
+def _list(key):
+    kind = key[0]
+    if kind == "tenants":
+        return [tenant.tenant_id for tenant in get_client(SubscriptionClient).tenants.list()]
+    if kind == "subscriptions":
+        return sorted(((sub.display_name, sub.subscription_id) for sub in get_client(SubscriptionClient).subscriptions.list()),
+                      key=lambda pair: pair[0].lower())
+    if kind == "resource_groups":
+        return _by_name(rg.name for rg in get_client(ResourceManagementClient, key[1]).resource_groups.list())
+    if kind == "vms":
+        return _by_name(vm.name for vm in get_client(ComputeManagementClient, key[1]).virtual_machines.list(key[2]))
+    raise ValueError(f"Unknown listing: {key}")
+
+
+# Process-wide cache of tenants, subscriptions, resource groups and VM names.
+# Listings are fetched by background threads, never by the page script:
+# a stale listing is served as-is while the thread refreshes it, and only a
+# listing never seen before makes the caller wait for its first fetch.
+class AzureHierarchy:
+    def __init__(self, ttl=HIERARCHY_TTL, list_fn=_list):
+        self.ttl = ttl
+        self.list_fn = list_fn
+        self._entries = {}
+        self._errors = {}
+        self._last_read = {}
+        self._waiting = {}
+        self._pending = set()
+        self._in_flight = set()
+        self._sub_ids_by_name = {}
+        self._sub_names_by_id = {}
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="azure-hierarchy")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="azure-hierarchy")
+        self._thread.start()
+
+    def _is_stale(self, key, now):
+        return now - self._entries[key][1] > self.ttl
+
+    # Cached listing for key, queueing a refresh when missing or stale
+    def _get(self, key):
+        with self._cond:
+            now = time.time()
+            self._last_read[key] = now
+            entry = self._entries.get(key)
+            if (entry is None or self._is_stale(key, now)) and key not in self._in_flight:
+                self._pending.add(key)
+                self._cond.notify()
+            if entry is not None:
+                return entry[0]
+            event = self._waiting.setdefault(key, threading.Event())
+        if not event.wait(LOAD_TIMEOUT):
+            raise TimeoutError(f"Azure did not return {key[0]} within {LOAD_TIMEOUT}s")
+        with self._cond:
+            entry = self._entries.get(key)
+            if entry is None:
+                raise self._errors.get(key) or LookupError(f"{key} was invalidated while loading")
+            return entry[0]
+
+    # Runs on the executor, so one slow listing never holds up the others
+    def _fetch(self, key):
+        value, error = None, None
+        try:
+            value = call_with_backoff(self.list_fn, key)
+        except Exception as e:
+            error = e
+        with self._cond:
+            self._in_flight.discard(key)
+            if error:
+                self._errors[key] = error
+            else:
+                self._entries[key] = (value, time.time())
+                self._errors.pop(key, None)
+                if key == SUBSCRIPTIONS:
+                    self._sub_ids_by_name = {name.lower(): sub_id for name, sub_id in value}
+                    self._sub_names_by_id = {sub_id: name for name, sub_id in value}
+            event = self._waiting.pop(key, None)
+            self._cond.notify()
+        if event:
+            event.set()
+
+    # Queue stale listings that were read since they were last fetched, and
+    # forget listings (and errors) nobody has read for IDLE_EXPIRY. A stale
+    # listing nobody reads is left alone until the next read asks for it.
+    def _queue_stale(self):
+        now = time.time()
+        for key in list(self._last_read):
+            if now - self._last_read[key] > IDLE_EXPIRY:
+                self._entries.pop(key, None)
+                self._errors.pop(key, None)
+                del self._last_read[key]
+            elif key in self._entries and self._is_stale(key, now) and self._last_read[key] > self._entries[key][1]:
+                self._pending.add(key)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending - self._in_flight, timeout=REFRESH_INTERVAL)
+                self._queue_stale()
+                keys = self._pending - self._in_flight
+                self._pending -= keys
+                self._in_flight |= keys
+            for key in keys:
+                self._executor.submit(self._fetch, key)
+
+    def tenant_ids(self):
+        return self._get(TENANTS)
+
+    # (display name, subscription id) pairs sorted by name
+    def subscriptions(self):
+        return self._get(SUBSCRIPTIONS)
+
+    def subscription_id(self, name):
+        self._get(SUBSCRIPTIONS)
+        return self._sub_ids_by_name.get(name.strip().lower())
+
+    def subscription_name(self, subscription_id):
+        self._get(SUBSCRIPTIONS)
+        return self._sub_names_by_id.get(subscription_id)
+
+    def resource_groups(self, subscription_id):
+        return self._get(("resource_groups", subscription_id))
+
+    def vm_names(self, subscription_id, resource_group):
+        return self._get(("vms", subscription_id, resource_group.lower()))
+
+    # Drop cached listings (all of them, or one subscription's) so the next read refetches
+    def invalidate(self, subscription_id=None):
+        with self._cond:
+            for key in list(self._entries):
+                if subscription_id is None or (len(key) > 1 and key[1] == subscription_id):
+                    del self._entries[key]
+                    self._errors.pop(key, None)
+
+
+# Process-wide hierarchy shared by all pages and sessions
+def get_hierarchy():
+    global _hierarchy
+    with _lock:
+        if _hierarchy is None:
+            _hierarchy = AzureHierarchy()
+        return _hierarchy
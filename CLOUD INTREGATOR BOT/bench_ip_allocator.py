@@ -0,0 +1,137 @@
+"""Benchmark the IP Allocator without Streamlit.
+
+Replays synthetic allocation workloads against the code behind
+get_allocated_subnets / allocate_next_subnet in pages/IP Allocater.py
+(AllocationStore and SubnetIndex) and reports allocations per second,
+p50/p99 latency, peak Python memory and the cold-load time of the result.
+
+    python bench_ip_allocator.py
+    python bench_ip_allocator.py --sizes 1000 10000 --layouts dense --mode index
+"""
+import argparse
+import ipaddress
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from allocation_store import AllocationStore
+from subnet_index import SubnetIndex
+
+BASE_NETWORK = ipaddress.IPv4Network("10.0.0.0/8")
+REGION = "bench"
+
+# Mixed request sizes, weighted towards small subnets like real spokes
+PREFIX_MIX = [24] * 1 + [26] * 2 + [27] * 3 + [28] * 4 + [29] * 2
+
+
+def make_workload(size: int, seed: int) -> list[int]:
+    rng = random.Random(seed)
+    return [rng.choice(PREFIX_MIX) for _ in range(size)]
+
+
+# Scattered existing allocations that break the free space into small holes
+def make_fragmentation(size: int, seed: int) -> list[ipaddress.IPv4Network]:
+    rng = random.Random(seed + 1)
+    slots = BASE_NETWORK.num_addresses // 256
+    first = int(BASE_NETWORK.network_address)
+    return [
+        ipaddress.IPv4Network((first + slot * 256 + rng.randrange(0, 256, 16), 28))
+        for slot in rng.sample(range(slots), min(size, slots))
+    ]
+
+
+def make_store(folder: str, existing: list[ipaddress.IPv4Network]) -> AllocationStore:
+    if existing:
+        with open(f"{folder}/{REGION}_allocated.txt", "w") as file:
+            file.write("".join(f"{subnet}\n" for subnet in existing))
+    return AllocationStore(folder, REGION, BASE_NETWORK)
+
+
+def run_allocations(mode: str, folder: str, existing, prefixes) -> tuple[list[int], float]:
+    if mode == "store":
+        allocator = make_store(folder, existing)
+    else:
+        allocator = SubnetIndex(BASE_NETWORK, existing)
+
+    latencies = []
+    allocated = list(existing)
+    for prefix in prefixes:
+        started = time.perf_counter_ns()
+        subnet = allocator.allocate(prefix)
+        latencies.append(time.perf_counter_ns() - started)
+        if subnet is None:
+            raise RuntimeError(f"{BASE_NETWORK} ran out of space for /{prefix}")
+        allocated.append(subnet)
+
+    # Time to read everything back the way a fresh page load would
+    started = time.perf_counter()
+    if mode == "store":
+        make_store(folder, []).allocated()
+    else:
+        SubnetIndex(BASE_NETWORK, allocated)
+    return latencies, time.perf_counter() - started
+
+
+def percentile(sorted_values: list[int], fraction: float) -> int:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def bench(mode: str, size: int, layout: str, seed: int) -> dict:
+    prefixes = make_workload(size, seed)
+    existing = make_fragmentation(size, seed) if layout == "fragmented" else []
+
+    folder = tempfile.mkdtemp(prefix="ip_bench_")
+    try:
+        latencies, load_seconds = run_allocations(mode, folder, existing, prefixes)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    # Second pass under tracemalloc so its overhead does not skew the timings
+    folder = tempfile.mkdtemp(prefix="ip_bench_")
+    tracemalloc.start()
+    try:
+        run_allocations(mode, folder, existing, prefixes)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(folder, ignore_errors=True)
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "layout": layout,
+        "size": size,
+        "allocs_per_sec": size / (sum(latencies) / 1e9),
+        "p50_us": percentile(latencies, 0.50) / 1e3,
+        "p99_us": percentile(latencies, 0.99) / 1e3,
+        "mean_us": statistics.fmean(latencies) / 1e3,
+        "peak_mb": peak / 2**20,
+        "load_ms": load_seconds * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IP Allocator benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--layouts", nargs="+", choices=["dense", "fragmented"], default=["dense", "fragmented"])
+    parser.add_argument("--mode", nargs="+", choices=["index", "store"], default=["index", "store"],
+                        help="index: SubnetIndex only, store: AllocationStore with fsynced journal")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    header = f"{'mode':<6} {'layout':<11} {'allocs':>8} {'allocs/s':>10} {'p50 us':>8} {'p99 us':>9} {'mean us':>8} {'peak MB':>8} {'load ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for mode in args.mode:
+        for layout in args.layouts:
+            for size in args.sizes:
+                r = bench(mode, size, layout, args.seed)
+                print(f"{r['mode']:<6} {r['layout']:<11} {r['size']:>8} {r['allocs_per_sec']:>10.0f} "
+                      f"{r['p50_us']:>8.1f} {r['p99_us']:>9.1f} {r['mean_us']:>8.1f} "
+                      f"{r['peak_mb']:>8.1f} {r['load_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import math
+import re
+
+# Chunk size and overlap in generator tokens. flan-t5 reads 512 tokens, so
+# RETRIEVAL_K chunks plus the prompt and question fit without truncation.
+CHUNK_TOKENS = 200
+CHUNK_OVERLAP = 40
+GENERATOR_INPUT_TOKENS = 512
+PROMPT_TOKENS = 100
+RETRIEVAL_K = max(1, (GENERATOR_INPUT_TOKENS - PROMPT_TOKENS) // CHUNK_TOKENS)
+
+# Identifies the chunking settings in saved index names, so an index built
+# with other settings is never reused
+CHUNKING_ID = f"chunks{CHUNK_TOKENS}o{CHUNK_OVERLAP}v2"
+
+# A chunk ending before a new section is emitted early once it is at least this full
+MIN_FILL = 0.5
+
+# Lines that open a section or clause: "ARTICLE 4", "Section 12", "7.2 Payment", "SCHEDULE B".
+# Only the keywords ignore case; a numbered heading needs a capital after the number.
+HEADING = re.compile(
+    r"^(?:(?i:article|section|clause|schedule|annex|appendix|exhibit)\s+[\dIVXLCivxlc]+[A-Za-z]?\b"
+    r"|\d+(?:\.\d+)*\.?\s+[A-Z(])")
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+(?=[\"'(\[]?[A-Z0-9])")
+ABBREVIATIONS = ("e.g.", "i.e.", "no.", "co.", "inc.", "ltd.", "mr.", "ms.", "dr.", "vs.", "etc.", "art.", "sec.")
+WORD_TOKENS = re.compile(r"\w+|[^\w\s]")
+
+
+# Rough token counts (words and punctuation marks) when no tokenizer is given
+def estimate_tokens(texts):
+    return [len(WORD_TOKENS.findall(text)) for text in texts]
+
+
+def _is_heading(line):
+    return bool(HEADING.match(line)) or (line.isupper() and 3 < len(line) < 80)
+
+
+def _ends_sentence(line):
+    return line.endswith((".", "!", "?", ";", ":"))
+
+
+# (text, heading, page_starts) paragraph blocks from (page number, text)
+# pairs: split at blank lines and at heading lines, with wrapped lines
+# joined. A paragraph whose last line on a page does not end a sentence
+# continues on the next page, and a line only opens a section after a line
+# that ends a sentence, so "within\n30 Days of ..." stays one sentence.
+# heading is set on blocks that open a section; page_starts holds the
+# (offset, page number) where each page's part of the text begins.
+def _blocks(pages):
+    lines, heading, closed = [], None, True
+    for page_number, text in pages:
+        for line in text.splitlines():
+            line = line.strip()
+            opens_section = bool(line) and closed and _is_heading(line)
+            if not line or opens_section:
+                if lines:
+                    yield _block(lines, heading)
+                lines, heading, closed = [], None, True
+                if not line:
+                    continue
+                heading = line[:80]
+            if lines and lines[-1][0].endswith("-"):
+                lines[-1] = (lines[-1][0][:-1] + line, lines[-1][1])
+            else:
+                lines.append((line, page_number))
+            closed = opens_section or _ends_sentence(line)
+        if lines and _ends_sentence(lines[-1][0]):
+            yield _block(lines, heading)
+            lines, heading = [], None
+    if lines:
+        yield _block(lines, heading)
+
+
+def _block(lines, heading):
+    text, page_starts = "", []
+    for line, page_number in lines:
+        if text:
+            text += " "
+        if not page_starts or page_starts[-1][1] != page_number:
+            page_starts.append((len(text), page_number))
+        text += line
+    return text, heading, page_starts
+
+
+# (sentence, start, end) for each sentence of a block, with offsets into it
+def _sentences(block):
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(block):
+        if block[start:match.start()].lower().endswith(ABBREVIATIONS):
+            continue
+        sentences.append((block[start:match.start()], start, match.start()))
+        start = match.end()
+    sentences.append((block[start:], start, len(block)))
+    return sentences
+
+
+def _page_at(page_starts, offset):
+    return next(page_number for start, page_number in reversed(page_starts) if start <= offset)
+
+
+# A sentence longer than a chunk, cut into word runs of about target tokens each
+def _split_long(sentence, tokens, target):
+    if tokens <= target:
+        return [(sentence, tokens)]
+    words = sentence.split()
+    pieces = math.ceil(tokens / target)
+    step = math.ceil(len(words) / pieces)
+    return [(" ".join(words[i:i + step]), math.ceil(tokens * len(words[i:i + step]) / len(words)))
+            for i in range(0, len(words), step)]
+
+
+def _chunk(units):
+    return " ".join(unit[0] for unit in units), {
+        "page": units[0][1],
+        "last_page": max(unit[2] for unit in units),
+        "section": units[-1][4],
+    }
+
+
+# Streams (text, metadata) chunks from (page number, text) pairs. Chunks
+# are built from whole sentences up to target_tokens, start afresh at a
+# section heading once half full, and otherwise repeat the last
+# overlap_tokens worth of sentences from the previous chunk. A sentence
+# running over a page break stays whole. metadata holds the first and last
+# page and the section the chunk ends in.
+# count_tokens maps a list of texts to their token counts.
+def chunk_pages(pages, target_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP, count_tokens=estimate_tokens):
+    current, size, section = [], 0, ""
+    for block, heading, page_starts in _blocks(pages):
+        sentences = _sentences(block)
+        counts = count_tokens([sentence for sentence, _, _ in sentences])
+        for position, ((sentence, start, end), tokens) in enumerate(zip(sentences, counts)):
+            first_page, last_page = _page_at(page_starts, start), _page_at(page_starts, max(start, end - 1))
+            for piece, piece_tokens in _split_long(sentence, tokens, target_tokens):
+                new_section = heading is not None and position == 0
+                if current and (size + piece_tokens > target_tokens
+                                or (new_section and size >= target_tokens * MIN_FILL)):
+                    yield _chunk(current)
+                    if new_section:
+                        current = []
+                    else:
+                        overlap = []
+                        for unit in reversed(current):
+                            if sum(u[3] for u in overlap) + unit[3] > overlap_tokens:
+                                break
+                            overlap.insert(0, unit)
+                        current = overlap
+                    size = sum(unit[3] for unit in current)
+                    while current and size + piece_tokens > target_tokens:
+                        size -= current.pop(0)[3]
+                if new_section:
+                    section, heading = heading, None
+                current.append((piece, first_page, last_page, piece_tokens, section))
+                size += piece_tokens
+    if current:
+        yield _chunk(current)
+
+
+# "p. 4" or "pp. 4-6" for a chunk's metadata
+def page_label(metadata):
+    first, last = metadata["page"], metadata["last_page"]
+    return f"p. {first}" if first == last else f"pp. {first}-{last}"
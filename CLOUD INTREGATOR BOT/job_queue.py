@@ -0,0 +1,189 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+from azure_fanout import throttle_delay
+
+# Background Azure jobs running at the same time across every queue and session.
+# Each queue class takes a share of these through max_running.
+MAX_BACKGROUND_JOBS = 32
+
+# Attempts per job when Azure answers with a transient error
+MAX_ATTEMPTS = 3
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "Queued", "Running", "Succeeded", "Failed"
+
+_lock = threading.Lock()
+_executor = None
+
+
+# Process-wide pool every JobQueue runs its jobs on
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_BACKGROUND_JOBS, thread_name_prefix="azure-job")
+        return _executor
+
+
+def is_transient(error):
+    if isinstance(error, (ServiceRequestError, ServiceResponseError)):
+        return True
+    return isinstance(error, HttpResponseError) and error.status_code in TRANSIENT_STATUS_CODES
+
+
+# Seconds to wait before retrying after a transient error
+def retry_delay(error, attempt):
+    if isinstance(error, HttpResponseError) and error.status_code == 429:
+        return throttle_delay(error, attempt)
+    return 2 ** attempt
+
+
+def error_text(error):
+    return str(error).splitlines()[0] if str(error) else type(error).__name__
+
+
+# One background job against one VM
+class VmJob:
+    def __init__(self, job_id, subscription_id, resource_group, vm_name):
+        self.job_id = job_id
+        self.subscription_id = subscription_id
+        self.resource_group = resource_group
+        self.vm_name = vm_name
+        self.status = QUEUED
+        self.attempts = 0
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.submitted_at
+
+    def is_for(self, subscription_id, resource_group, vm_name):
+        return (self.subscription_id == subscription_id and self.resource_group.lower() == resource_group.lower()
+                and self.vm_name.lower() == vm_name.lower())
+
+
+# Runs VM jobs on the process-wide pool so the Streamlit script never waits
+# on a poller; pages submit jobs and read back their status on each rerun.
+# Subclasses implement perform(job), one attempt that raises on failure;
+# transient Azure errors are retried with backoff. Jobs submitted together
+# form a batch that never has more than its limit running at once, and a
+# VM with an unfinished job never gets a second one. A queue never runs more
+# than max_running jobs across all its batches, so one kind of job cannot
+# take every worker of the shared pool; waiting batches take turns.
+class JobQueue:
+    max_running = MAX_BACKGROUND_JOBS
+
+    def __init__(self):
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._batches = []
+        self._running = 0
+
+    def perform(self, job):
+        raise NotImplementedError
+
+    # Called after a job has succeeded and its result is set; failures here
+    # must not turn the job into a failed one
+    def on_success(self, job):
+        pass
+
+    # Queue one job per (subscription_id, resource_group, vm_name) target, at
+    # most limit running at a time. make_job(job_id, subscription_id,
+    # resource_group, vm_name) builds a job. Returns (job, queued) pairs in
+    # target order; queued is False where the VM's unfinished job was returned.
+    def submit_batch(self, targets, make_job, limit):
+        results, new_jobs = [], []
+        with self._lock:
+            for subscription_id, resource_group, vm_name in targets:
+                job = self._find_unfinished(subscription_id, resource_group, vm_name)
+                if job is None:
+                    job = make_job(next(self._ids), subscription_id, resource_group, vm_name)
+                    self._jobs[job.job_id] = job
+                    new_jobs.append(job)
+                    results.append((job, True))
+                else:
+                    results.append((job, False))
+            if new_jobs:
+                self._batches.append({"waiting": deque(new_jobs), "running": 0, "limit": max(1, limit)})
+        self._dispatch()
+        return results
+
+    def _find_unfinished(self, subscription_id, resource_group, vm_name):
+        for job in self._jobs.values():
+            if not job.done and job.is_for(subscription_id, resource_group, vm_name):
+                return job
+        return None
+
+    # Start waiting jobs, one per batch in turn, while the queue and each
+    # batch are under their limits
+    def _dispatch(self):
+        ready = []
+        with self._lock:
+            started = True
+            while started:
+                started = False
+                for batch in self._batches:
+                    if self._running >= self.max_running:
+                        break
+                    if batch["waiting"] and batch["running"] < batch["limit"]:
+                        ready.append((batch["waiting"].popleft(), batch))
+                        batch["running"] += 1
+                        self._running += 1
+                        started = True
+            self._batches = [batch for batch in self._batches if batch["waiting"]]
+        for job, batch in ready:
+            get_executor().submit(self._execute, job, batch)
+
+    def _execute(self, job, batch):
+        try:
+            self._run(job)
+        finally:
+            with self._lock:
+                batch["running"] -= 1
+                self._running -= 1
+            self._dispatch()
+
+    def _run(self, job):
+        job.status = RUNNING
+        while True:
+            job.attempts += 1
+            try:
+                self.perform(job)
+                job.status = SUCCEEDED
+                break
+            except Exception as e:
+                if job.attempts >= MAX_ATTEMPTS or not is_transient(e):
+                    job.status = FAILED
+                    job.error = error_text(e)
+                    break
+                time.sleep(retry_delay(e, job.attempts))
+        job.finished_at = time.time()
+        if job.status == SUCCEEDED:
+            self.on_success(job)
+
+    # All jobs, newest first
+    def jobs(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.job_id, reverse=True)
+
+    # Newest job for a VM, if any
+    def latest(self, subscription_id, resource_group, vm_name):
+        for job in self.jobs():
+            if job.is_for(subscription_id, resource_group, vm_name):
+                return job
+        return None
+
+    def clear_finished(self):
+        with self._lock:
+            self._jobs = {job_id: job for job_id, job in self._jobs.items() if not job.done}
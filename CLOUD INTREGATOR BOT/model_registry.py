@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+GENERATOR_MODEL = "google/flan-t5-small"
+
+# Texts encoded per forward pass of the embedding model
+EMBED_BATCH_SIZE = 64
+
+# Set to 1 to load and warm up every model when the app starts
+WARM_UP_ENV = "BAU_WARM_UP_MODELS"
+
+_lock = threading.Lock()
+_registry = None
+
+
+def _rss():
+    return psutil.Process(os.getpid()).memory_info().rss if psutil else None
+
+
+# Bytes held by a model's weights: the torch module inside a LangChain or
+# transformers wrapper (embeddings.client, pipeline.model), if there is one
+def _parameter_bytes(obj):
+    for candidate in (obj, getattr(obj, "client", None), getattr(obj, "model", None)):
+        parameters = getattr(candidate, "parameters", None)
+        if callable(parameters):
+            return sum(p.numel() * p.element_size() for p in parameters())
+    return None
+
+
+def _load_embeddings():
+    from langchain.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": EMBED_BATCH_SIZE})
+
+
+def _load_generator():
+    from transformers import pipeline
+    return pipeline("text2text-generation", model=GENERATOR_MODEL)
+
+
+class ModelEntry:
+    def __init__(self, name, loader, warm_up=None):
+        self.name = name
+        self.loader = loader
+        self.warm_up = warm_up
+        self.model = None
+        self.load_seconds = None
+        self.warm_up_seconds = None
+        self.rss_delta = None
+        self.parameter_bytes = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def as_row(self):
+        megabytes = lambda value: round(value / 2**20, 1) if value is not None else None
+        return {
+            "Model": self.name,
+            "Loaded": self.model is not None,
+            "Load (s)": round(self.load_seconds, 2) if self.load_seconds is not None else None,
+            "Warm-up (s)": round(self.warm_up_seconds, 2) if self.warm_up_seconds is not None else None,
+            "Weights (MB)": megabytes(self.parameter_bytes),
+            "RSS Growth (MB)": megabytes(self.rss_delta),
+            "Error": str(self.error) if self.error else "",
+        }
+
+
+# Loads each model once per process, on first use, and shares it across
+# sessions. Each model has its own lock, so two sessions asking for the
+# same model wait for one load, while different models load in parallel.
+class ModelRegistry:
+    def __init__(self):
+        self._entries = {}
+        self._warm_up_thread = None
+
+    def register(self, name, loader, warm_up=None):
+        self._entries[name] = ModelEntry(name, loader, warm_up)
+
+    def get(self, name):
+        entry = self._entries[name]
+        if entry.model is not None:
+            return entry.model
+        with entry.lock:
+            if entry.model is None:
+                rss_before = _rss()
+                started = time.perf_counter()
+                try:
+                    model = entry.loader()
+                except Exception as e:
+                    entry.error = e
+                    raise
+                entry.load_seconds = time.perf_counter() - started
+                rss_after = _rss()
+                entry.rss_delta = rss_after - rss_before if rss_before is not None else None
+                entry.parameter_bytes = _parameter_bytes(model)
+                entry.error = None
+                entry.model = model
+            return entry.model
+
+    # Load every model and run its warm-up call once, so the first real
+    # request does not pay for lazy initialisation
+    def warm_up(self):
+        for entry in self._entries.values():
+            try:
+                model = self.get(entry.name)
+                if entry.warm_up and entry.warm_up_seconds is None:
+                    started = time.perf_counter()
+                    entry.warm_up(model)
+                    entry.warm_up_seconds = time.perf_counter() - started
+            except Exception as e:
+                entry.error = e
+
+    def warm_up_async(self):
+        with _lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self.warm_up, daemon=True, name="model-warm-up")
+                self._warm_up_thread.start()
+
+    def stats(self):
+        return [entry.as_row() for entry in self._entries.values()]
+
+
+# Process-wide registry with the RAG bot's embedding and generation models
+def get_registry():
+    global _registry
+    with _lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+            _registry.register(EMBEDDING_MODEL, _load_embeddings,
+                               warm_up=lambda model: model.embed_query("warm up"))
+            _registry.register(GENERATOR_MODEL, _load_generator,
+                               warm_up=lambda model: model("warm up", max_new_tokens=1))
+        return _registry
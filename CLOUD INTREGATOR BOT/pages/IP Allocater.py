@@ -1,84 +1,149 @@
-import streamlit as st
-import ipaddress
-import os
-
-# Define base IP ranges for each region
-REGION_IP_RANGES = {
-    "west europe": ipaddress.IPv4Network("10.0.0.0/16"),
-    "east us": ipaddress.IPv4Network("10.1.0.0/16"),
-}
-
-# Folder to store allocation data
-DATA_FOLDER = "ip_data"
-os.makedirs(DATA_FOLDER, exist_ok=True)
-
-# Retrieve all allocated subnets for a region
-def get_allocated_subnets(region: str) -> list[ipaddress.IPv4Network]:
-    path = f"{DATA_FOLDER}/{region}_allocated.txt"
-    subnets = []
-    if os.path.exists(path):
-        with open(path, "r") as file:
-            for line in file:
-                try:
-                    subnets.append(ipaddress.IPv4Network(line.strip()))
-                except ValueError:
-                    continue
-    return subnets
-
-# Save a newly allocated subnet
-def save_allocated_subnet(region: str, subnet: ipaddress.IPv4Network):
-    path = f"{DATA_FOLDER}/{region}_allocated.txt"
-    with open(path, "a") as file:
-        file.write(str(subnet) + "\n")
-
-# Allocate the next available subnet of the requested prefix
-def allocate_next_subnet(region: str, prefix: int) -> ipaddress.IPv4Network | None:
-    base_network = REGION_IP_RANGES[region]
-    allocated = get_allocated_subnets(region)
-
-    for subnet in base_network.subnets(new_prefix=prefix):
-        if all(not subnet.overlaps(existing) for existing in allocated):
-            save_allocated_subnet(region, subnet)
-            return subnet
-
-    st.error("No available subnet found within base IP range for requested prefix.")
-    return None
-
-# Streamlit UI
-def main():
-    st.title("Azure Region IP Subnet Allocator")
-
-    # Show all allocated subnets
-    st.header("Allocated IP Ranges by Region:")
-    for region in REGION_IP_RANGES.keys():
-        allocated = get_allocated_subnets(region)
-        if allocated:
-            for subnet in allocated:
-                st.write(f"{region.title()}: {subnet}")
-        else:
-            st.write(f"{region.title()}: No allocations yet")
-
-    st.markdown("---")
-
-    region = st.selectbox("Select Azure Region", options=list(REGION_IP_RANGES.keys()))
-    prefix_input = st.text_input("Enter subnet prefix length (e.g. 26 or 28)", value="28")
-
-    if st.button("Allocate Next Subnet"):
-        try:
-            prefix = int(prefix_input)
-            if prefix < 1 or prefix > 32:
-                st.error("Subnet prefix must be between 1 and 32.")
-                return
-        except ValueError:
-            st.error("Please enter a valid integer for subnet prefix.")
-            return
-
-        next_subnet = allocate_next_subnet(region, prefix)
-        if next_subnet:
-            st.success(f"Allocated IP Range: {next_subnet}")
-            
-st.markdown("---")
-st.caption("Powered by TCS | Developed by Cloud Exponence")
-
-if __name__ == "__main__":
+import streamlit as st
+import ipaddress
+import os
+from allocation_store import AllocationStore
+
+# Define base IP ranges for each region
+REGION_IP_RANGES = {
+    "west europe": ipaddress.IPv4Network("10.0.0.0/16"),
+    "east us": ipaddress.IPv4Network("10.1.0.0/16"),
+}
+
+# Folder to store allocation data
+DATA_FOLDER = "ip_data"
+os.makedirs(DATA_FOLDER, exist_ok=True)
+
+# Rows per page in the allocation listing
+ALLOCATIONS_PAGE_SIZE = 100
+
+# One allocation store per region, shared by every session in this process
+@st.cache_resource
+def get_allocation_store(region: str) -> AllocationStore:
+    return AllocationStore(DATA_FOLDER, region, REGION_IP_RANGES[region])
+
+# Retrieve all allocated subnets for a region
+def get_allocated_subnets(region: str) -> list[ipaddress.IPv4Network]:
+    return get_allocation_store(region).allocated()
+
+# Allocate the next available subnet of the requested prefix
+def allocate_next_subnet(region: str, prefix: int) -> ipaddress.IPv4Network | None:
+    subnet = get_allocation_store(region).allocate(prefix)
+    if subnet:
+        return subnet
+
+    st.error("No available subnet found within base IP range for requested prefix.")
+    return None
+
+# Parse a batch spec such as "4x24, 8x26, 16x28" into a list of prefix lengths
+def parse_prefix_batch(spec: str) -> list[int]:
+    prefixes = []
+    for item in spec.replace(";", ",").split(","):
+        item = item.strip().lower().replace("/", "")
+        if not item:
+            continue
+        count, _, prefix = item.rpartition("x")
+        count = int(count) if count else 1
+        prefix = int(prefix)
+        if count < 1 or prefix < 1 or prefix > 32:
+            raise ValueError(item)
+        prefixes.extend([prefix] * count)
+    return prefixes
+
+# Allocate a batch of subnets atomically: either all of them or none
+def allocate_subnet_batch(region: str, prefixes: list[int]) -> list[ipaddress.IPv4Network] | None:
+    subnets = get_allocation_store(region).allocate_many(prefixes)
+    if subnets is not None:
+        return subnets
+
+    st.error("Not enough free space in the base IP range for the whole batch. Nothing was allocated.")
+    return None
+
+# Used/free counts, largest free block and fragmentation for one region,
+# plus a paged listing of its allocations
+def show_region_utilization(region: str):
+    base_network = REGION_IP_RANGES[region]
+    free_space = get_allocation_store(region).free_space()
+    total = base_network.num_addresses
+    free = free_space.free_addresses()
+    used = total - free
+    largest = free_space.largest_free_prefix()
+
+    st.subheader(f"{region.title()} ({base_network})")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Used Addresses", f"{used:,}", f"{used / total:.1%} of range", delta_color="off")
+    col2.metric("Free Addresses", f"{free:,}")
+    col3.metric("Largest Free Block", f"/{largest}" if largest is not None else "None")
+    col4.metric("Fragmentation", f"{free_space.fragmentation():.2f}")
+
+    with st.expander("Free space by prefix length"):
+        prefixes = range(base_network.prefixlen, 33)
+        st.dataframe({
+            "Prefix": [f"/{p}" for p in prefixes],
+            "Free Blocks of This Size": [free_space.free_block_count(p) for p in prefixes],
+            "Subnets Still Available": [free_space.available(p) for p in prefixes],
+        }, hide_index=True)
+
+    with st.expander("Allocated IP ranges"):
+        allocated = get_allocated_subnets(region)
+        if allocated:
+            page_count = (len(allocated) - 1) // ALLOCATIONS_PAGE_SIZE + 1
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, key=f"{region}_allocations_page")
+            start = (page - 1) * ALLOCATIONS_PAGE_SIZE
+            st.dataframe({"IP Range": [str(s) for s in allocated[start:start + ALLOCATIONS_PAGE_SIZE]]}, hide_index=True)
+            st.caption(f"{len(allocated):,} allocations, page {page} of {page_count}")
+        else:
+            st.write("No allocations yet")
+
+# Streamlit UI
+def main():
+    st.title("Azure Region IP Subnet Allocator")
+
+    # Show address space usage per region from the free-space index
+    st.header("Address Space Utilization by Region:")
+    for region in REGION_IP_RANGES.keys():
+        show_region_utilization(region)
+
+    st.markdown("---")
+
+    region = st.selectbox("Select Azure Region", options=list(REGION_IP_RANGES.keys()))
+    prefix_input = st.text_input("Enter subnet prefix length (e.g. 26 or 28)", value="28")
+
+    if st.button("Allocate Next Subnet"):
+        try:
+            prefix = int(prefix_input)
+            if prefix < 1 or prefix > 32:
+                st.error("Subnet prefix must be between 1 and 32.")
+                return
+        except ValueError:
+            st.error("Please enter a valid integer for subnet prefix.")
+            return
+
+        next_subnet = allocate_next_subnet(region, prefix)
+        if next_subnet:
+            st.success(f"Allocated IP Range: {next_subnet}")
+
+    st.subheader("Bulk Allocation")
+    with st.form("bulk_allocation"):
+        batch_spec = st.text_input("Subnets to allocate as count x prefix (e.g. 4x24, 8x26, 16x28)")
+        submitted = st.form_submit_button("Allocate Batch")
+
+    if submitted:
+        try:
+            prefixes = parse_prefix_batch(batch_spec)
+        except ValueError:
+            st.error("Please enter the batch as comma separated count x prefix pairs, prefixes between 1 and 32.")
+            return
+        if not prefixes:
+            st.error("Please enter at least one subnet to allocate.")
+            return
+
+        subnets = allocate_subnet_batch(region, prefixes)
+        if subnets:
+            st.success(f"Allocated {len(subnets)} IP Ranges in {region.title()}")
+            st.dataframe({"Prefix": [f"/{p}" for p in prefixes], "IP Range": [str(s) for s in subnets]})
+            
+st.markdown("---")
+st.caption("Powered by TCS | Developed by Cloud Exponence")
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,126 +1,200 @@
-import streamlit as st
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.subscription import SubscriptionClient
-
-# Authenticate globally
-credential = DefaultAzureCredential()
-
-@st.cache_data(show_spinner=False)
-def list_subscriptions():
-    sub_client = SubscriptionClient(credential)
-    # Return list of (name, id)
-    return [(sub.display_name, sub.subscription_id) for sub in sub_client.subscriptions.list()]
-
-def extract_resource_group(resource_id):
-    parts = resource_id.split('/')
-    try:
-        rg_index = parts.index('resourceGroups') + 1
-        return parts[rg_index]
-    except (ValueError, IndexError):
-        return None
-
-def get_resources_by_tags(subscription_id, tags):
-    resource_client = ResourceManagementClient(credential, subscription_id)
-    filters = []
-    for k, v in tags.items():
-        if v:
-            filters.append(f"tagName eq '{k}' and tagValue eq '{v}'")
-    filter_query = " and ".join(filters) if filters else ""
-    resources = resource_client.resources.list(filter=filter_query)
-    return list(resources)
-
-def get_resource_tags(subscription_id, resource_id):
-    resource_client = ResourceManagementClient(credential, subscription_id)
-    tag_response = resource_client.tags.get_at_scope(resource_id)
-    return tag_response.properties.tags
-
-st.title("Azure Tenant-wide Resource Tag Lookup Bot")
-
-# Load subscriptions and let user select subset or all
-subscriptions = list_subscriptions()
-subscription_names = [name for name, _ in subscriptions]
-
-selected_subscription_names = st.multiselect(
-    "Select Azure Subscriptions (leave empty to select all)",
-    options=subscription_names,
-)
-
-# Map selected sub names back to IDs
-selected_subscription_ids = [
-    sub_id for (name, sub_id) in subscriptions if not selected_subscription_names or name in selected_subscription_names
-]
-
-# Enter tags for filtering
-st.header("Search Resources by Tag Values")
-cost_id = st.text_input("CostCenter-or-OrderNumber")
-owner_email = st.text_input("OwnerEmail")
-service = st.text_input("Service")
-sponsor = st.text_input("Sponsor")
-
-tags = {
-    "CostCenter-or-OrderNumber": cost_id,
-    "OwnerEmail": owner_email,
-    "service": service,
-    "sponsor": sponsor,
-}
-
-# Search button triggers the resource search
-if st.button("Search Resources"):
-    if all(v == "" for v in tags.values()):
-        st.warning("Please enter at least one tag to search")
-    else:
-        all_resources = []
-        for sub_id in selected_subscription_ids:
-            try:
-                resources = get_resources_by_tags(sub_id, tags)
-                for r in resources:
-                    r.subscription_id = sub_id
-                all_resources.extend(resources)
-            except Exception as e:
-                st.error(f"Error fetching resources for subscription {sub_id}: {e}")
-
-        if not all_resources:
-            st.info("No resources found with the specified tags.")
-        else:
-            # Group resources by resource group using extracted resource group name
-            rg_dict = {}
-            for r in all_resources:
-                rg_name = extract_resource_group(r.id)
-                rg_dict.setdefault(rg_name if rg_name else "Unknown", []).append(r)
-
-            # Display resources grouped by resource group with expanders
-            for rg, res_list in rg_dict.items():
-                with st.expander(f"Resource Group: {rg}"):
-                    for res in res_list:
-                        st.write(f"**Resource Name:** {res.name}  ({res.type})")
-                        if st.button(f"Show Tags for {res.name}", key=res.id):
-                            try:
-                                tags = get_resource_tags(res.subscription_id, res.id)
-                                st.json(tags)
-                            except Exception as e:
-                                st.error(f"Failed to get tags for resource '{res.name}': {e}")
-
-# Resource name lookup section
-st.header("Lookup Resource Tags by Resource Name")
-resource_name_search = st.text_input("Enter Resource Name")
-
-if resource_name_search:
-    found = False
-    for sub_id in selected_subscription_ids:
-        try:
-            client = ResourceManagementClient(credential, sub_id)
-            resources = list(client.resources.list())
-            for res in resources:
-                if res.name.lower() == resource_name_search.lower():
-                    tags = get_resource_tags(sub_id, res.id)
-                    st.write(f"Resource: {res.name} (Subscription ID: {sub_id}, Resource Group: {extract_resource_group(res.id)})")
-                    st.json(tags)
-                    found = True
-        except Exception as e:
-            st.error(f"Error during resource lookup: {e}")
-
-    if not found:
-        st.info("Resource not found.")
-st.markdown("---")
+import streamlit as st
+from azure.mgmt.resource import ResourceManagementClient
+from azure_clients import get_client
+from azure_fanout import fan_out
+from azure_hierarchy import get_hierarchy
+from resource_inventory import ResourceInventory, resource_record
+from tag_index import TagCondition, TagIndex, parse_tag_query
+
+def list_subscriptions():
+    # Return list of (name, id)
+    return get_hierarchy().subscriptions()
+
+# ARM leaves the tags out of tag-filtered listings, so list the whole
+# subscription (tags included) and evaluate the query locally
+def get_resources_by_tags(subscription_id, conditions, mode):
+    resource_client = get_client(ResourceManagementClient, subscription_id)
+    records = [resource_record(res, subscription_id) for res in resource_client.resources.list()]
+    return [records[position] for position in sorted(TagIndex(records).query(conditions, mode))]
+
+def get_resource_tags(subscription_id, resource_id):
+    resource_client = get_client(ResourceManagementClient, subscription_id)
+    tag_response = resource_client.tags.get_at_scope(resource_id)
+    return tag_response.properties.tags
+
+# Tenant-wide inventory shared by all sessions, persisted on disk and refreshed in the background
+@st.cache_resource(show_spinner=False)
+def get_inventory():
+    return ResourceInventory(lambda: [sub_id for _, sub_id in list_subscriptions()], lambda sub_id: list(get_client(ResourceManagementClient, sub_id).resources.list()))
+
+# The four standard tag fields plus free-form conditions, as one query.
+# A value ending in "*" matches by prefix.
+def build_tag_conditions(tags, extra_conditions, prefix_values):
+    conditions = [
+        TagCondition(key, value.strip().rstrip("*"), prefix_values or value.strip().endswith("*"))
+        for key, value in tags.items() if value.strip()
+    ]
+    return conditions + parse_tag_query(extra_conditions)
+
+# Add resources to their resource-group expanders, creating expanders on first use.
+# Tags come from the listing that found the resource, so no extra request per resource.
+def show_in_resource_groups(records, container, rg_expanders):
+    for record in records:
+        rg_name = record["resource_group"] or "Unknown"
+        if rg_name not in rg_expanders:
+            rg_expanders[rg_name] = container.expander(f"Resource Group: {rg_name}")
+        with rg_expanders[rg_name]:
+            st.write(f"**Resource Name:** {record['name']}  ({record['type']})")
+            st.json(record["tags"], expanded=False)
+
+# Re-read tags for a whole result set with concurrent requests.
+# Returns updated copies in the original order and the number of failures.
+def refresh_tags(records):
+    fresh_tags, failures = {}, 0
+    for record, resource_tags, error in fan_out(lambda r: get_resource_tags(r["subscription_id"], r["id"]), records):
+        if error:
+            failures += 1
+        else:
+            fresh_tags[record["id"]] = resource_tags or {}
+    return [dict(record, tags=fresh_tags.get(record["id"], record["tags"])) for record in records], failures
+
+# Matched resources, summary line and a batched tag refresh for them
+def show_search_footer(results):
+    st.caption(results["summary"])
+    if st.button("Refresh Tags from Azure"):
+        with st.spinner(f"Refreshing tags for {len(results['records']):,} resources..."):
+            results["records"], failures = refresh_tags(results["records"])
+        if failures:
+            st.session_state["tag_refresh_failures"] = failures
+        st.rerun()
+    failures = st.session_state.pop("tag_refresh_failures", 0)
+    if failures:
+        st.warning(f"Tags could not be refreshed for {failures} resources; showing the previously listed tags.")
+
+# Name lookups show at most this many matches
+MAX_NAME_MATCHES = 200
+
+st.title("Azure Tenant-wide Resource Tag Lookup Bot")
+
+# Load subscriptions and let user select subset or all
+subscriptions = list_subscriptions()
+subscription_names = [name for name, _ in subscriptions]
+
+selected_subscription_names = st.multiselect(
+    "Select Azure Subscriptions (leave empty to select all)",
+    options=subscription_names,
+)
+
+# Map selected sub names back to IDs
+selected_subscription_ids = [
+    sub_id for (name, sub_id) in subscriptions if not selected_subscription_names or name in selected_subscription_names
+]
+
+# Enter tags for filtering
+st.header("Search Resources by Tag Values")
+cost_id = st.text_input("CostCenter-or-OrderNumber")
+owner_email = st.text_input("OwnerEmail")
+service = st.text_input("Service")
+sponsor = st.text_input("Sponsor")
+
+extra_conditions = st.text_input("Other tag conditions (e.g. env=prod, app=web*, !Owner=bob)")
+col1, col2, col3 = st.columns(3)
+combine = col1.radio("Combine conditions with", ["AND", "OR"], horizontal=True)
+prefix_values = col2.checkbox("Match tag values by prefix")
+live_search = col3.checkbox("Query Azure live instead of the cached inventory")
+
+tags = {
+    "CostCenter-or-OrderNumber": cost_id,
+    "OwnerEmail": owner_email,
+    "service": service,
+    "sponsor": sponsor,
+}
+
+inventory = get_inventory()
+
+# Search button triggers the resource search
+if st.button("Search Resources"):
+    try:
+        conditions = build_tag_conditions(tags, extra_conditions, prefix_values)
+    except ValueError as e:
+        st.error(f"Invalid tag condition: {e}")
+        conditions = None
+
+    if conditions == []:
+        st.warning("Please enter at least one tag to search")
+    elif conditions:
+        mode = combine.lower()
+        results_area = st.container()
+        rg_expanders = {}
+        matched = []
+        if live_search:
+            # Query all subscriptions concurrently and show each one's matches as soon as it answers
+            progress = st.progress(0.0, text="Searching subscriptions...")
+            searched = 0
+            for sub_id, records, error in fan_out(lambda sub: get_resources_by_tags(sub, conditions, mode), selected_subscription_ids):
+                searched += 1
+                progress.progress(searched / len(selected_subscription_ids),
+                                  text=f"Searched {searched} of {len(selected_subscription_ids)} subscriptions")
+                if error:
+                    st.error(f"Error fetching resources for subscription {sub_id}: {error}")
+                    continue
+                show_in_resource_groups(records, results_area, rg_expanders)
+                matched.extend(records)
+            progress.empty()
+        else:
+            # Answer from the inverted tag index over the cached inventory
+            with st.spinner("Building resource inventory (first run only)..."):
+                snapshot = inventory.ensure_fresh()
+            if snapshot is None:
+                st.error(f"Resource inventory is not available yet: {inventory.last_error}")
+            else:
+                matched = inventory.find_by_tags(conditions, mode, selected_subscription_ids)
+                show_in_resource_groups(matched, results_area, rg_expanders)
+
+        # Keep the results so reruns (e.g. a tag refresh) do not search again
+        if matched:
+            summary = f"{len(matched):,} resources matched: " + f" {combine} ".join(map(repr, conditions))
+            st.session_state["tag_search"] = {"records": matched, "summary": summary}
+            show_search_footer(st.session_state["tag_search"])
+        else:
+            st.session_state.pop("tag_search", None)
+            st.info("No resources found with the specified tags.")
+elif "tag_search" in st.session_state:
+    results = st.session_state["tag_search"]
+    show_in_resource_groups(results["records"], st.container(), {})
+    show_search_footer(results)
+
+# Resource name lookup section
+st.header("Lookup Resource Tags by Resource Name")
+col1, col2 = st.columns([3, 1])
+resource_name_search = col1.text_input("Enter Resource Name")
+match_mode = col2.radio("Match", ["Exact", "Prefix", "Contains"], horizontal=True)
+
+if inventory.snapshot:
+    age_minutes = int(inventory.age() // 60)
+    status = " (refreshing in background...)" if inventory.refreshing else ""
+    st.caption(f"Inventory of {len(inventory.snapshot.records):,} resources, updated {age_minutes} min ago{status}")
+if st.button("Refresh Inventory Now"):
+    inventory.refresh_async()
+    st.info("Inventory refresh started in the background.")
+
+if resource_name_search:
+    with st.spinner("Building resource inventory (first run only)..."):
+        snapshot = inventory.ensure_fresh()
+    if snapshot is None:
+        st.error(f"Resource inventory is not available yet: {inventory.last_error}")
+    else:
+        if snapshot.failed_subscriptions:
+            st.warning(f"{len(snapshot.failed_subscriptions)} subscriptions could not be listed in the last refresh; their resources may be out of date.")
+        matches = inventory.find_by_name(resource_name_search, match_mode.lower(),
+                                         subscription_ids=selected_subscription_ids, limit=MAX_NAME_MATCHES)
+        for record in matches:
+            st.write(f"Resource: {record['name']} (Subscription ID: {record['subscription_id']}, Resource Group: {record['resource_group']})")
+            st.json(record["tags"])
+        if len(matches) == MAX_NAME_MATCHES:
+            st.caption(f"Showing the first {MAX_NAME_MATCHES} matches. Refine the name to narrow the results.")
+
+        if not matches:
+            st.info("Resource not found.")
+st.markdown("---")
 st.caption("Powered by TCS | Developed by Cloud Exponence")
\ No newline at end of file
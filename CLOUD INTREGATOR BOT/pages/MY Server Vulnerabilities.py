@@ -1,40 +1,79 @@
-import streamlit as st
-import pandas as pd
-import os
-
-# Path to your Excel file
-EXCEL_PATH = r"C:\Users\Anupam\OneDrive\Desktop\CLOUD INTREGATOR BOT\VULF\VUL.xlsx"
-
-@st.cache_data
-def load_data(path):
-    if not os.path.exists(path):
-        st.error(f"Excel file not found at path: {path}")
-        return pd.DataFrame()
-    df = pd.read_excel(path)
-    required_cols = ['IP', 'DNS', 'Server Owner', 'Support Team']
-    missing_cols = [c for c in required_cols if c not in df.columns]
-    if missing_cols:
-        st.error(f"Excel missing columns: {missing_cols}")
-        return pd.DataFrame()
-    return df[required_cols]
-
-st.title("Azure Servers Vulnerabilities By Owner")
-
-df = load_data(EXCEL_PATH)
-
-if df.empty:
-    st.warning("No data loaded. Check Excel path and columns.")
-else:
-    # User types owner name to search for (case-insensitive substring)
-    owner_query = st.text_input("Type your name (Owner) to search for your servers")
-
-    if owner_query:
-        filtered = df[df['Server Owner'].str.contains(owner_query, case=False, na=False)]
-        if filtered.empty:
-            st.info(f"No records found matching owner name: {owner_query}")
-        else:
-            st.write(f"Showing servers and vulnerabilities matching owner: '{owner_query}'")
-            st.dataframe(filtered.reset_index(drop=True))
-st.markdown("---")
-st.caption("Powered by TCS | Developed by Cloud Exponence")
-
+import streamlit as st
+import pandas as pd
+import os
+from vulnerability_cache import REQUIRED_COLUMNS, read_columnar
+from vulnerability_ingest import DATASET_COLUMNS, EXPORTS_FOLDER, VulnerabilityDataset
+from vulnerability_search import VulnerabilitySearch
+
+# Scanner exports (CSV or XLSX) in EXPORTS_FOLDER are merged into one
+# de-duplicated dataset; drop new exports there and they are picked up
+# on the next visit
+
+# Rows shown for one search
+MAX_RESULTS = 1000
+
+@st.cache_resource
+def get_dataset():
+    return VulnerabilityDataset()
+
+# Stream exports added or changed since the last visit into the dataset,
+# and drop the rows of exports that were deleted
+def ingest_new_exports(dataset):
+    pending = dataset.pending_files(EXPORTS_FOLDER)
+    if not pending and not dataset.missing_files() and os.path.exists(dataset.snapshot_path):
+        return
+    with st.status(f"Ingesting {len(pending)} new exports...", expanded=True) as status:
+        report = dataset.sync(EXPORTS_FOLDER, on_progress=lambda path, rows: status.update(
+            label=f"Ingesting {os.path.basename(path)}: {rows:,} rows read"))
+        for path, error in report["errors"].items():
+            st.error(f"Could not ingest {os.path.basename(path)}: {error}")
+        label = f"Ingested {report['files']} exports ({report['rows']:,} rows)"
+        if report["removed"]:
+            label += f", removed {report['removed']} deleted exports"
+        status.update(label=label, state="complete", expanded=False)
+
+# The snapshot is columnar on disk; the mtime argument makes this process
+# reload it after an ingest, and only the newest snapshot is kept in memory
+@st.cache_data(max_entries=1)
+def load_data(path, mtime):
+    return read_columnar(path, DATASET_COLUMNS)
+
+# Search index built once per dataset snapshot and shared by all sessions;
+# the previous snapshot's index is dropped when a new one is built
+@st.cache_resource(show_spinner="Indexing servers...", max_entries=1)
+def get_search_index(path, mtime):
+    return VulnerabilitySearch(load_data(path, mtime))
+
+st.title("Azure Servers Vulnerabilities By Owner")
+
+dataset = get_dataset()
+if os.path.isdir(EXPORTS_FOLDER):
+    ingest_new_exports(dataset)
+else:
+    st.error(f"Exports folder not found: {EXPORTS_FOLDER}")
+
+if os.path.exists(dataset.snapshot_path):
+    snapshot_mtime = os.path.getmtime(dataset.snapshot_path)
+    df = load_data(dataset.snapshot_path, snapshot_mtime)
+else:
+    df = pd.DataFrame()
+
+if df.empty:
+    st.warning(f"No data loaded. Put scanner exports with {', '.join(REQUIRED_COLUMNS)} columns in {EXPORTS_FOLDER}.")
+else:
+    # Owner or team names (typos allowed), DNS name or suffix, IP or CIDR range
+    owner_query = st.text_input("Type your name (Owner) to search for your servers")
+    st.caption("You can also search by support team, DNS name, DNS suffix (e.g. .corp.net) or IP / CIDR (e.g. 10.0.1.0/24)")
+
+    if owner_query:
+        search_index = get_search_index(dataset.snapshot_path, snapshot_mtime)
+        filtered = search_index.search(owner_query, limit=MAX_RESULTS)
+        if filtered.empty:
+            st.info(f"No records found matching owner name: {owner_query}")
+        else:
+            shown = f"first {MAX_RESULTS}" if len(filtered) == MAX_RESULTS else len(filtered)
+            st.write(f"Showing {shown} servers and vulnerabilities matching: '{owner_query}' (best matches first)")
+            st.dataframe(filtered.reset_index(drop=True))
+st.markdown("---")
+st.caption("Powered by TCS | Developed by Cloud Exponence")
+
@@ -1,61 +1,143 @@
-import fitz  # PyMuPDF
-from sentence_transformers import SentenceTransformer
-from langchain_community.vectorstores.faiss import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.llms import HuggingFacePipeline
-from transformers import pipeline
-from langchain.chains import RetrievalQA
-import streamlit as st
-
-# Function to load and chunk contract text from PDF
-def load_and_split_contract(file, chunk_size=1000):
-    doc = fitz.open(stream=file.read(), filetype="pdf")
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text()
-    words = full_text.split()
-    chunks = []
-    for i in range(0, len(words), chunk_size):
-        chunk = " ".join(words[i:i+chunk_size])
-        chunks.append(chunk)
-    return chunks
-
-# Function to embed text chunks using local sentence-transformers and create FAISS vector store
-def build_vectorstore(text_chunks):
-    embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vector_store = FAISS.from_texts(text_chunks, embedding_model)
-    return vector_store
-
-# Create RAG QA chain using Hugging Face local model
-def create_rag_qa_chain(vector_store):
-    hf_pipeline = pipeline("text2text-generation", model="google/flan-t5-small")
-    llm = HuggingFacePipeline(pipeline=hf_pipeline)
-    retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-    qa_chain = RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
-    return qa_chain
-
-# Run query on the RAG chain and get answer
-def answer_query(qa_chain, question):
-    return qa_chain.run(question)
-
-# Streamlit UI
-@st.cache_data
-def load_data_and_create_qa(uploaded_file):
-    chunks = load_and_split_contract(uploaded_file)
-    vector_store = build_vectorstore(chunks)
-    qa_chain = create_rag_qa_chain(vector_store)
-    return qa_chain
-
-st.title("Contract Reading RAG Bot Demo (Local Models)")
-
-uploaded_file = st.file_uploader("Upload Contract PDF", type=["pdf"])
-
-if uploaded_file is not None:
-    qa_chain = load_data_and_create_qa(uploaded_file)
-    question = st.text_input("Ask a question about the contract")
-
-    if question:
-        answer = answer_query(qa_chain, question)
-        st.write("Answer:", answer)
-st.markdown("---")
+from itertools import islice
+from sentence_transformers import SentenceTransformer
+from langchain_community.vectorstores.faiss import FAISS
+from langchain.llms import HuggingFacePipeline
+from langchain.chains import RetrievalQA
+from contract_chunker import CHUNKING_ID, RETRIEVAL_K, chunk_pages, page_label
+from model_registry import EMBED_BATCH_SIZE, EMBEDDING_MODEL, GENERATOR_MODEL, get_registry
+from pdf_extraction import extract_pages, page_count
+from rag_index_cache import IndexCache, document_hash, index_key
+import streamlit as st
+
+# Contracts whose index and QA chain stay loaded in memory; the rest are
+# read back from the disk cache when asked about again
+MAX_OPEN_CONTRACTS = 4
+
+# Token counts as the generator sees them, so chunks fit its input window
+def generator_token_counts(texts):
+    tokenizer = get_registry().get(GENERATOR_MODEL).tokenizer
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+# Function to load and chunk contract text from PDF; pages are extracted in
+# parallel and (text, metadata) chunks are yielded as they fill
+def load_and_split_contract(data, on_page=None):
+    def pages():
+        for number, text in extract_pages(data):
+            if on_page:
+                on_page(number)
+            yield number, text
+    return chunk_pages(pages(), count_tokens=generator_token_counts)
+
+# Function to embed text chunks using local sentence-transformers and create FAISS vector store.
+# Chunks are embedded batch by batch as they arrive, so extraction keeps running meanwhile.
+def build_vectorstore(chunks, embedding_model, batch_size=EMBED_BATCH_SIZE, on_batch=None):
+    vector_store = None
+    chunks = iter(chunks)
+    while batch := list(islice(chunks, batch_size)):
+        texts, metadatas = zip(*batch)
+        if vector_store is None:
+            vector_store = FAISS.from_texts(list(texts), embedding_model, metadatas=list(metadatas))
+        else:
+            vector_store.add_texts(list(texts), metadatas=list(metadatas))
+        if on_batch:
+            on_batch(len(batch))
+    return vector_store
+
+# Vector indexes saved on disk by document hash and embedding model
+@st.cache_resource
+def get_index_cache():
+    return IndexCache()
+
+# Create RAG QA chain using Hugging Face local model (shared by every session)
+def create_rag_qa_chain(vector_store):
+    hf_pipeline = get_registry().get(GENERATOR_MODEL)
+    llm = HuggingFacePipeline(pipeline=hf_pipeline)
+    retriever = vector_store.as_retriever(search_kwargs={"k": RETRIEVAL_K})
+    qa_chain = RetrievalQA.from_chain_type(llm=llm, retriever=retriever, return_source_documents=True)
+    return qa_chain
+
+# Run query on the RAG chain and get the answer with the pages it came from
+def answer_query(qa_chain, question):
+    result = qa_chain.invoke({"query": question})
+    sources = []
+    for doc in result["source_documents"]:
+        label = page_label(doc.metadata)
+        if doc.metadata.get("section"):
+            label += f" ({doc.metadata['section']})"
+        if label not in sources:
+            sources.append(label)
+    return result["result"], sources
+
+# Embed the contract with a progress bar and save its index to disk
+def index_contract(data, key):
+    total_pages = page_count(data)
+    progress = st.progress(0.0, text="Reading contract...")
+    state = {"pages": 0, "chunks": 0}
+
+    def show_progress():
+        progress.progress(state["pages"] / max(total_pages, 1),
+                          text=f"Read {state['pages']} of {total_pages} pages, embedded {state['chunks']} chunks")
+
+    def on_page(number):
+        state["pages"] = number
+        show_progress()
+
+    def on_batch(size):
+        state["chunks"] += size
+        show_progress()
+
+    chunks = load_and_split_contract(data, on_page=on_page)
+    vector_store = build_vectorstore(chunks, get_registry().get(EMBEDDING_MODEL), on_batch=on_batch)
+    progress.empty()
+    if vector_store is None:
+        return False
+    get_index_cache().save(key, vector_store)
+    return True
+
+# Streamlit UI
+# Keyed by the PDF's content hash; the index is read from disk, where
+# index_contract left it or where an earlier upload saved it. Raises
+# FileNotFoundError (which is not cached) when the index is not on disk.
+@st.cache_resource(show_spinner="Loading contract index...", max_entries=MAX_OPEN_CONTRACTS)
+def load_qa_chain(doc_hash):
+    vector_store = get_index_cache().load(index_key(doc_hash, EMBEDDING_MODEL, CHUNKING_ID), get_registry().get(EMBEDDING_MODEL))
+    if vector_store is None:
+        raise FileNotFoundError(f"No saved index for contract {doc_hash[:12]}")
+    qa_chain = create_rag_qa_chain(vector_store)
+    return qa_chain
+
+# QA chain for the uploaded PDF, embedding it first when no index is saved;
+# None when the PDF has no text. Another session may evict the index between
+# the check and the load, in which case it is embedded again.
+def open_contract(data, doc_hash):
+    key = index_key(doc_hash, EMBEDDING_MODEL, CHUNKING_ID)
+    if key not in get_index_cache() and not index_contract(data, key):
+        return None
+    try:
+        return load_qa_chain(doc_hash)
+    except FileNotFoundError:
+        if not index_contract(data, key):
+            return None
+        return load_qa_chain(doc_hash)
+
+st.title("Contract Reading RAG Bot Demo (Local Models)")
+
+uploaded_file = st.file_uploader("Upload Contract PDF", type=["pdf"])
+
+if uploaded_file is not None:
+    data = uploaded_file.getvalue()
+    qa_chain = open_contract(data, document_hash(data))
+    if qa_chain is not None:
+        question = st.text_input("Ask a question about the contract")
+
+        if question:
+            answer, sources = answer_query(qa_chain, question)
+            st.write("Answer:", answer)
+            st.caption("Sources: " + "; ".join(sources))
+    else:
+        st.error("No text could be extracted from this PDF (is it a scanned image?).")
+
+with st.expander("Model Status"):
+    st.dataframe(get_registry().stats(), use_container_width=True, hide_index=True)
+st.markdown("---")
 st.caption("Powered by TCS | Developed by Cloud Exponence")
\ No newline at end of file
@@ -1,82 +1,127 @@
-import streamlit as st
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.monitor import MonitorManagementClient
-from azure.mgmt.resource.subscriptions import SubscriptionClient
-import pandas as pd
-from datetime import datetime, timedelta
-
-st.set_page_config(page_title="Azure VM Availability Bot", layout="wide")
-st.title("Azure VM Availability")
-
-# ----------- Input Fields -----------
-subscription_name = st.text_input("Enter Azure Subscription Name:")
-resource_group = st.text_input("Enter Resource Group Name:")
-vm_name = st.text_input("Enter Virtual Machine Name:")
-
-custom_range = st.checkbox("Use Custom Time Range")
-if custom_range:
-    start_date = st.date_input("Start Date", datetime.now() - timedelta(days=7))
-    end_date = st.date_input("End Date", datetime.now())
-else:
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30)
-
-# ----------- Function to get subscription ID by name -----------
-def get_subscription_id_by_name(credential, sub_name):
-    subscription_client = SubscriptionClient(credential)
-    for sub in subscription_client.subscriptions.list():
-        if sub.display_name.lower() == sub_name.lower().strip():
-            return sub.subscription_id
-    return None
-
-# ----------- Metric Query Execution -----------
-if st.button("Generate Availability Report"):
-    if not subscription_name or not vm_name or not resource_group:
-        st.warning("Please fill Subscription Name, Resource Group, and VM Name.")
-    else:
-        try:
-            credential = DefaultAzureCredential()
-            subscription_id = get_subscription_id_by_name(credential, subscription_name)
-            
-            if not subscription_id:
-                st.error(f"Subscription '{subscription_name}' not found or inaccessible.")
-            else:
-                monitor_client = MonitorManagementClient(credential, subscription_id)
-
-                resource_id = (
-                    f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/"
-                    f"Microsoft.Compute/virtualMachines/{vm_name}"
-                )
-
-                metrics_data = monitor_client.metrics.list(
-                    resource_id,
-                    timespan=f"{start_date}/{end_date}",
-                    interval="PT1H",
-                    metricnames="VmAvailabilityMetric",
-                    aggregation="Average"
-                )
-
-                records = []
-                for metric in metrics_data.value:
-                    for ts in metric.timeseries:
-                        for point in ts.data:
-                            if point.average is not None:
-                                records.append({
-                                    "Timestamp": point.time_stamp,
-                                    "Availability": round(point.average * 100, 2)
-                                })
-
-                df = pd.DataFrame(records)
-
-                if df.empty:
-                    st.warning("No VM availability data found (VmAvailabilityMetric not emitted yet).")
-                else:
-                    avg_avail = df["Availability"].mean()
-                    st.metric("Average Availability (%)", round(avg_avail, 2))
-
-                    st.line_chart(df.set_index("Timestamp")["Availability"])
-
-        except Exception as e:
-            st.error(f"Error fetching data: {e}")
-st.markdown("---")
+import streamlit as st
+from availability_store import AvailabilityStore
+from azure_hierarchy import get_hierarchy
+from vm_availability import fetch_availability, fetch_fleet_availability, fleet_report, list_vm_ids
+import pandas as pd
+from datetime import datetime, timedelta
+
+st.set_page_config(page_title="Azure VM Availability Bot", layout="wide")
+st.title("Azure VM Availability")
+
+# Rows shown in the fleet worst-offenders table
+WORST_OFFENDERS = 20
+
+# Preset report ranges in days; anything older than 93 days comes from the local store
+RANGE_PRESETS = {"Last 30 days": 30, "Last 90 days": 90, "Last 365 days": 365}
+
+# ----------- Input Fields -----------
+report_type = st.radio("Report Type", ["Single VM", "Fleet"], horizontal=True)
+subscription_name = st.text_input("Enter Azure Subscription Name:")
+if report_type == "Single VM":
+    resource_group = st.text_input("Enter Resource Group Name:")
+    vm_name = st.text_input("Enter Virtual Machine Name:")
+else:
+    resource_group = st.text_input("Enter Resource Group Name (leave empty for the whole subscription):")
+    vm_name = None
+
+time_range = st.selectbox("Time Range", list(RANGE_PRESETS) + ["Custom"])
+if time_range == "Custom":
+    start_date = st.date_input("Start Date", datetime.now() - timedelta(days=7))
+    end_date = st.date_input("End Date", datetime.now())
+else:
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=RANGE_PRESETS[time_range])
+
+# Hourly availability history kept on disk, so reports only fetch days not seen before
+@st.cache_resource
+def get_availability_store():
+    return AvailabilityStore()
+
+# ----------- Function to get subscription ID by name -----------
+def get_subscription_id_by_name(sub_name):
+    return get_hierarchy().subscription_id(sub_name)
+
+# ----------- Fleet Report -----------
+def show_fleet_availability(subscription_id, resource_group):
+    with st.spinner("Listing virtual machines..."):
+        vm_ids = list_vm_ids(subscription_id, resource_group or None)
+    if not vm_ids:
+        st.warning("No virtual machines found.")
+        return
+
+    progress = st.progress(0.0, text=f"Fetching availability for {len(vm_ids)} VMs...")
+    series, errors = fetch_fleet_availability(
+        vm_ids, start_date, end_date, store=get_availability_store(),
+        on_progress=lambda done, total: progress.progress(done / total, text=f"Fetched {done} of {total} VMs"))
+    progress.empty()
+    if errors:
+        st.warning(f"Availability could not be fetched for {len(errors)} VMs.")
+
+    report = fleet_report(series, start_date, end_date)
+    if not report["percentiles"]:
+        st.warning("No VM availability data found (VmAvailabilityMetric not emitted yet).")
+        return
+
+    st.subheader(f"Fleet Availability for {len(vm_ids)} VMs")
+    cols = st.columns(len(report["percentiles"]))
+    for col, (label, value) in zip(cols, report["percentiles"].items()):
+        col.metric(f"{label} SLA (%)", round(value, 3))
+    st.line_chart(report["trend"])
+
+    st.subheader("Worst Offenders")
+    st.dataframe(report["per_vm"].head(WORST_OFFENDERS), hide_index=True, use_container_width=True)
+    with st.expander("All VMs"):
+        st.dataframe(report["per_vm"], hide_index=True, use_container_width=True)
+    with st.expander(f"Downtime Windows ({len(report['windows'])})"):
+        st.dataframe(report["windows"], hide_index=True, use_container_width=True)
+
+# ----------- Metric Query Execution -----------
+if st.button("Generate Availability Report"):
+    if report_type == "Fleet":
+        if not subscription_name:
+            st.warning("Please fill Subscription Name.")
+        else:
+            try:
+                subscription_id = get_subscription_id_by_name(subscription_name)
+                if not subscription_id:
+                    st.error(f"Subscription '{subscription_name}' not found or inaccessible.")
+                else:
+                    show_fleet_availability(subscription_id, resource_group.strip())
+            except Exception as e:
+                st.error(f"Error fetching data: {e}")
+    elif not subscription_name or not vm_name or not resource_group:
+        st.warning("Please fill Subscription Name, Resource Group, and VM Name.")
+    else:
+        try:
+            subscription_id = get_subscription_id_by_name(subscription_name)
+            
+            if not subscription_id:
+                st.error(f"Subscription '{subscription_name}' not found or inaccessible.")
+            else:
+                resource_id = (
+                    f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/"
+                    f"Microsoft.Compute/virtualMachines/{vm_name}"
+                )
+
+                series, errors = get_availability_store().sync([resource_id], start_date, end_date, fetch_availability)
+                if errors:
+                    raise errors[resource_id]
+
+                availability = series[resource_id]
+                df = pd.DataFrame({
+                    "Timestamp": availability.index,
+                    "Availability": (availability.to_numpy() * 100).round(2)
+                })
+
+                if df.empty:
+                    st.warning("No VM availability data found (VmAvailabilityMetric not emitted yet).")
+                else:
+                    avg_avail = df["Availability"].mean()
+                    st.metric("Average Availability (%)", round(avg_avail, 2))
+
+                    st.line_chart(df.set_index("Timestamp")["Availability"])
+
+        except Exception as e:
+            st.error(f"Error fetching data: {e}")
+st.markdown("---")
 st.caption("Powered by TCS | Developed by Cloud Exponence")
\ No newline at end of file
@@ -1,82 +1,159 @@
-import streamlit as st
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.resource.subscriptions import SubscriptionClient
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.compute import ComputeManagementClient
-from datetime import timedelta
-
-@st.cache_resource
-def get_subscriptions(_credential):
-    client = SubscriptionClient(_credential)
-    return list(client.subscriptions.list())
-
-@st.cache_resource
-def get_resource_groups(_credential, subscription_id):
-    client = ResourceManagementClient(_credential, subscription_id)
-    return list(client.resource_groups.list())
-
-@st.cache_resource
-def get_vms(_credential, subscription_id, resource_group):
-    client = ComputeManagementClient(_credential, subscription_id)
-    return list(client.virtual_machines.list(resource_group))
-
-def get_vm_patch_status(compute_client, rg, vm_name):
-    try:
-        patch_result = compute_client.virtual_machines.begin_assess_patches(
-            resource_group_name=rg, vm_name=vm_name).result()
-    except Exception as e:
-        return f"Error fetching patch status: {e}"
-
-    text = f"Patch Assessment Started At: {patch_result.start_date_time}\n"
-    text += f"Critical and Security Patches Pending: {patch_result.critical_and_security_patch_count}\n"
-    text += f"Other Patches Pending: {patch_result.other_patch_count}\n"
-    text += f"Reboot Pending: {patch_result.reboot_pending}\n"
-    text += f"Operation Status: {patch_result.status}\n\n"
-
-    if patch_result.available_patches:
-        text += "Available Patches:\n"
-        for patch in patch_result.available_patches:
-            name = patch.name or "Unknown"
-            classification = ", ".join(patch.classifications) if patch.classifications else "None"
-            published = patch.published_date or "Unknown"
-            text += f"- {name} | Classifications: {classification} | Published: {published}\n"
-    else:
-        text += "No available patches found.\n"
-    return text
-
-
-st.title("Azure VM Patch Status")
-
-credential = DefaultAzureCredential()
-subscriptions = get_subscriptions(credential)
-sub_name_to_id = {sub.display_name: sub.subscription_id for sub in subscriptions}
-subscription_name = st.selectbox("Select Subscription", options=list(sub_name_to_id.keys()))
-
-if subscription_name:
-    subscription_id = sub_name_to_id[subscription_name]
-    resource_groups = get_resource_groups(credential, subscription_id)
-    if resource_groups:
-        rg_names = [rg.name for rg in resource_groups]
-        resource_group = st.selectbox("Select Resource Group", rg_names)
-        if resource_group:
-            vms = get_vms(credential, subscription_id, resource_group)
-            if vms:
-                vm_names = [vm.name for vm in vms]
-                vm_name = st.selectbox("Select VM", vm_names)
-                if vm_name:
-                    compute_client = ComputeManagementClient(credential, subscription_id)
-
-                    st.header("Patch Status")
-                    patch_status = get_vm_patch_status(compute_client, resource_group, vm_name)
-                    st.text(patch_status)
-
-            else:
-                st.warning("No VMs found in the selected Resource Group.")
-        else:
-            st.warning("Please select a Resource Group.")
-    else:
-        st.warning("No Resource Groups found.")
-else:
-    st.warning("Please select a Subscription.")
-st.markdown("---")
+import streamlit as st
+from azure_hierarchy import get_hierarchy
+from patch_assessment import DEFAULT_CONCURRENCY, MAX_CONCURRENCY, PatchAssessmentRunner, list_vm_targets
+from patch_history import PatchHistory
+from tag_index import parse_tag_query
+
+# Seconds between compliance table updates while assessments are running
+LIVE_UPDATE_INTERVAL = 2
+
+# Every finished assessment, kept on disk and queried without calling Azure
+@st.cache_resource
+def get_patch_history():
+    return PatchHistory()
+
+# Assessments run in the background and outlive reruns and sessions
+@st.cache_resource
+def get_assessment_runner():
+    return PatchAssessmentRunner(history=get_patch_history())
+
+def format_patch_status(summary):
+    text = f"Patch Assessment Started At: {summary['started_at']}\n"
+    text += f"Critical and Security Patches Pending: {summary['critical_and_security']}\n"
+    text += f"Other Patches Pending: {summary['other']}\n"
+    text += f"Reboot Pending: {summary['reboot_pending']}\n"
+    text += f"Operation Status: {summary['status']}\n\n"
+
+    if summary["patches"]:
+        text += "Available Patches:\n"
+        for patch in summary["patches"]:
+            classification = ", ".join(patch["classifications"]) if patch["classifications"] else "None"
+            published = patch["published"] or "Unknown"
+            text += f"- {patch['name']} | Classifications: {classification} | Published: {published}\n"
+    else:
+        text += "No available patches found.\n"
+    return text
+
+def show_vm_patch_status(subscription_id, resource_group, vm_name):
+    runner = get_assessment_runner()
+    st.header("Patch Status")
+    if st.button("Assess Patches"):
+        runner.run([(subscription_id, resource_group, vm_name)], max_concurrency=1)
+
+    job = runner.latest(subscription_id, resource_group, vm_name)
+    if job is None:
+        st.info("No assessment yet. Click 'Assess Patches' to run one; it can take a few minutes.")
+    elif job.summary:
+        st.text(format_patch_status(job.summary))
+    elif job.error:
+        st.text(f"Error fetching patch status: {job.error}")
+    else:
+        st.info(f"Assessment {job.status.lower()}. Results will appear in the compliance table below.")
+
+    history = get_patch_history().vm_history(subscription_id, resource_group, vm_name)
+    if not history.empty:
+        with st.expander(f"Assessment History ({len(history)})"):
+            st.dataframe(history, hide_index=True, use_container_width=True)
+
+def show_fleet_assessment_form(subscription_id, resource_group):
+    with st.expander("Fleet Patch Assessment", expanded=False):
+        scope = st.radio("Assess VMs in", ["Selected Resource Group", "Whole Subscription"], horizontal=True)
+        tag_query = st.text_input("Only VMs with tags (optional, e.g. env=prod, !service=legacy)")
+        concurrency = st.slider("Assessments at a time", 1, MAX_CONCURRENCY, DEFAULT_CONCURRENCY)
+        if st.button("Assess Fleet"):
+            try:
+                conditions = parse_tag_query(tag_query)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            with st.spinner("Listing virtual machines..."):
+                targets = list_vm_targets(
+                    subscription_id, resource_group if scope == "Selected Resource Group" else None, conditions)
+            if not targets:
+                st.warning("No VMs match.")
+                return
+            jobs = get_assessment_runner().run(targets, max_concurrency=concurrency)
+            st.success(f"Assessing {len(jobs)} VMs, {concurrency} at a time.")
+
+# Progress and table for every assessment
+def show_compliance_progress():
+    jobs = get_assessment_runner().jobs()
+    finished = [job for job in jobs if job.done]
+    compliant = sum(1 for job in finished if job.summary and job.summary["critical_and_security"] == 0)
+    st.progress(len(finished) / len(jobs) if jobs else 1.0,
+                text=f"{len(finished)} of {len(jobs)} assessments finished | {compliant} compliant")
+    st.dataframe([job.as_row() for job in jobs], hide_index=True, use_container_width=True)
+
+# Compliance table for every assessment. With live updates on, it reruns on
+# its own as a fragment, so polling never holds up the rest of the page.
+def show_compliance_table():
+    runner = get_assessment_runner()
+    jobs = runner.jobs()
+    if not jobs:
+        return
+    st.header("Patch Compliance")
+    col1, col2 = st.columns(2)
+    live = col1.checkbox("Live updates", value=True)
+    if col2.button("Clear Finished"):
+        runner.clear_finished()
+        st.rerun()
+    running = not all(job.done for job in jobs)
+    st.fragment(show_compliance_progress, run_every=LIVE_UPDATE_INTERVAL if live and running else None)()
+
+# Fleet-wide answers from the stored history of the newest assessment per VM
+def show_patch_history(subscription_id):
+    history = get_patch_history()
+    compliance = history.fleet_compliance(subscription_id)
+    if compliance.empty:
+        return
+    st.header("Patch History")
+    tab1, tab2, tab3 = st.tabs(["Fleet Compliance", "Patch Age", "Missing KB"])
+    with tab1:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("VMs Assessed", len(compliance))
+        col2.metric("Compliant (%)", round(compliance["Compliant"].mean() * 100, 1))
+        col3.metric("Reboot Pending", int(compliance["Reboot Pending"].sum()))
+        st.dataframe(compliance, hide_index=True, use_container_width=True)
+    with tab2:
+        st.caption("Pending patches by days since they were published")
+        st.bar_chart(history.patch_age_distribution(subscription_id))
+    with tab3:
+        kb = st.text_input("KB number or patch name (e.g. KB5034441)")
+        if kb.strip():
+            missing = history.vms_missing(kb, subscription_id)
+            st.write(f"{missing['VM'].nunique()} VMs are missing {kb.strip()}")
+            st.dataframe(missing, hide_index=True, use_container_width=True)
+
+
+st.title("Azure VM Patch Status")
+
+hierarchy = get_hierarchy()
+sub_name_to_id = dict(hierarchy.subscriptions())
+subscription_name = st.selectbox("Select Subscription", options=list(sub_name_to_id.keys()))
+
+if subscription_name:
+    subscription_id = sub_name_to_id[subscription_name]
+    rg_names = hierarchy.resource_groups(subscription_id)
+    if rg_names:
+        resource_group = st.selectbox("Select Resource Group", rg_names)
+        if resource_group:
+            show_fleet_assessment_form(subscription_id, resource_group)
+            vm_names = hierarchy.vm_names(subscription_id, resource_group)
+            if vm_names:
+                vm_name = st.selectbox("Select VM", vm_names)
+                if vm_name:
+                    show_vm_patch_status(subscription_id, resource_group, vm_name)
+
+            else:
+                st.warning("No VMs found in the selected Resource Group.")
+        else:
+            st.warning("Please select a Resource Group.")
+    else:
+        st.warning("No Resource Groups found.")
+    show_patch_history(subscription_id)
+else:
+    st.warning("Please select a Subscription.")
+
+show_compliance_table()
+st.markdown("---")
 st.caption("Powered by TCS | Developed by Cloud Exponence")
\ No newline at end of file
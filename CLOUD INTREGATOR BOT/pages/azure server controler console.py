@@ -1,148 +1,211 @@
-import streamlit as st
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.resource.subscriptions import SubscriptionClient
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.monitor import MonitorManagementClient
-import datetime
-
-@st.cache_resource
-def get_tenants(_credential):
-    subscription_client = SubscriptionClient(_credential)
-    return list(subscription_client.tenants.list())
-
-@st.cache_resource
-def get_subscriptions(_credential):
-    subscription_client = SubscriptionClient(_credential)
-    return list(subscription_client.subscriptions.list())
-
-@st.cache_resource
-def get_resource_groups(_credential, subscription_id):
-    client = ResourceManagementClient(_credential, subscription_id)
-    return list(client.resource_groups.list())
-
-@st.cache_resource
-def get_vms(_credential, subscription_id, resource_group):
-    compute_client = ComputeManagementClient(_credential, subscription_id)
-    return list(compute_client.virtual_machines.list(resource_group))
-
-def get_vm_power_state(compute_client, rg, vm_name):
-    vm_instance = compute_client.virtual_machines.get(rg, vm_name, expand="instanceView")
-    statuses = vm_instance.instance_view.statuses
-    return next((s.display_status for s in statuses if s.code.startswith("PowerState")), "Unknown")
-
-def get_vm_tags(compute_client, rg, vm_name):
-    vm = compute_client.virtual_machines.get(rg, vm_name)
-    return vm.tags if vm.tags else {}
-
-def get_cpu_and_memory_metrics(monitor_client, resource_id):
-    end_time = datetime.datetime.utcnow()
-    start_time = end_time - datetime.timedelta(minutes=30)
-
-    metrics_data = monitor_client.metrics.list(
-        resource_id,
-        timespan=f"{start_time}/{end_time}",
-        interval="PT5M",
-        metricnames="Percentage CPU,Available Memory Percentage",
-        aggregation="Average"
-    )
-
-    cpu_values, mem_values = [], []
-    for item in metrics_data.value:
-        for ts in item.timeseries:
-            for data in ts.data:
-                if item.name.value == "Percentage CPU" and data.average is not None:
-                    cpu_values.append(data.average)
-                if item.name.value == "Available Memory Percentage" and data.average is not None:
-                    mem_values.append(data.average)
-
-    return cpu_values, mem_values
-
-def vm_start(compute_client, rg, vm_name):
-    op = compute_client.virtual_machines.begin_start(rg, vm_name)
-    op.wait()
-
-def vm_stop(compute_client, rg, vm_name):
-    op = compute_client.virtual_machines.begin_power_off(rg, vm_name)
-    op.wait()
-
-def vm_restart(compute_client, rg, vm_name):
-    op = compute_client.virtual_machines.begin_restart(rg, vm_name)
-    op.wait()
-
-st.title("Azure VM Monitor and Control")
-
-credential = DefaultAzureCredential()
-
-tenants = get_tenants(credential)
-tenant_ids = [t.tenant_id for t in tenants]
-tenant_id = st.selectbox("Select Tenant ID", options=tenant_ids)
-
-subscriptions = get_subscriptions(credential)
-sub_name_to_id = {sub.display_name: sub.subscription_id for sub in subscriptions}
-subscription_name = st.selectbox("Select Subscription", options=list(sub_name_to_id.keys()))
-
-if subscription_name:
-    subscription_id = sub_name_to_id[subscription_name]
-
-    resource_groups = get_resource_groups(credential, subscription_id)
-    rg_names = [rg.name for rg in resource_groups]
-    resource_group = st.selectbox("Select Resource Group", rg_names)
-
-    if resource_group:
-        vms = get_vms(credential, subscription_id, resource_group)
-        vm_names = [vm.name for vm in vms]
-        vm_name = st.selectbox("Select VM", vm_names)
-
-        if vm_name:
-            compute_client = ComputeManagementClient(credential, subscription_id)
-            monitor_client = MonitorManagementClient(credential, subscription_id)
-
-            power_state = get_vm_power_state(compute_client, resource_group, vm_name)
-            tags = get_vm_tags(compute_client, resource_group, vm_name)
-            st.markdown(f"### VM Power State: **{power_state}**")
-            st.markdown("### VM Tags:")
-            if tags:
-                for k, v in tags.items():
-                    st.write(f"- **{k}**: {v}")
-            else:
-                st.write("No tags available.")
-
-            col1, col2, col3 = st.columns(3)
-            if col1.button("Start VM"):
-                vm_start(compute_client, resource_group, vm_name)
-                st.success("Start command sent!")
-
-            if col2.button("Stop VM"):
-                vm_stop(compute_client, resource_group, vm_name)
-                st.success("Stop command sent!")
-
-            if col3.button("Restart VM"):
-                vm_restart(compute_client, resource_group, vm_name)
-                st.success("Restart command sent!")
-
-            if st.button("Refresh CPU and Memory Metrics"):
-                resource_id = f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.Compute/virtualMachines/{vm_name}"
-                cpu_data, mem_data = get_cpu_and_memory_metrics(monitor_client, resource_id)
-                if cpu_data:
-                    st.subheader("CPU Usage (%) Last 30 mins")
-                    st.line_chart(cpu_data)
-                    st.write(f"Average CPU Usage: {sum(cpu_data)/len(cpu_data):.2f}%")
-                else:
-                    st.warning("No CPU data found.")
-
-                if mem_data:
-                    st.subheader("Available Memory (%) Last 30 mins")
-                    st.line_chart(mem_data)
-                    st.write(f"Average Available Memory: {sum(mem_data)/len(mem_data):.2f}%")
-                else:
-                    st.warning("No Memory data found.")
-        else:
-            st.info("Please select a VM to see details and controls.")
-    else:
-        st.info("Please select a Resource Group to proceed.")
-else:
-    st.info("Please select a Subscription to proceed.")
-    
-st.markdown("---")
+import streamlit as st
+from azure.mgmt.compute import ComputeManagementClient
+from azure_clients import get_client
+from azure_hierarchy import get_hierarchy
+from vm_operations import ACTIONS, OperationQueue
+from vm_metrics import CPU, MEMORY, MetricsCache, vm_label
+import pandas as pd
+
+def power_state_of(vm):
+    statuses = vm.instance_view.statuses if vm.instance_view else []
+    return next((s.display_status for s in statuses if s.code.startswith("PowerState")), "Unknown")
+
+# Power state and tags of one VM from a single instance-view GET
+def get_vm_power_state_and_tags(compute_client, rg, vm_name):
+    vm = compute_client.virtual_machines.get(rg, vm_name, expand="instanceView")
+    return power_state_of(vm), vm.tags if vm.tags else {}
+
+# Every VM in a resource group, or the whole subscription, with its power state.
+# One paged list call with the instance view expanded instead of two GETs per VM.
+@st.cache_data(ttl=60, show_spinner="Loading VM fleet...")
+def get_vm_fleet(subscription_id, resource_group=None):
+    compute_client = get_client(ComputeManagementClient, subscription_id)
+    if resource_group:
+        vms = compute_client.virtual_machines.list(resource_group, expand="instanceView")
+    else:
+        vms = compute_client.virtual_machines.list_all(expand="instanceView")
+    return [
+        {
+            "Name": vm.name,
+            "Resource Group": vm.id.split("/")[4],
+            "Power State": power_state_of(vm),
+            "Size": vm.hardware_profile.vm_size if vm.hardware_profile else None,
+            "Location": vm.location,
+            "Tags": ", ".join(f"{k}={v}" for k, v in (vm.tags or {}).items()),
+        }
+        for vm in vms
+    ]
+
+# CPU and memory points cached across reruns and sessions; refreshes only fetch newer points
+@st.cache_resource
+def get_metrics_cache():
+    return MetricsCache()
+
+def vm_resource_id(subscription_id, resource_group, vm_name):
+    return f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.Compute/virtualMachines/{vm_name}"
+
+# Fleet-level CPU/memory view: average and peak over time plus a per-VM summary
+def show_fleet_metrics(resource_ids):
+    metrics_cache = get_metrics_cache()
+    with st.spinner(f"Fetching metrics for {len(resource_ids)} VMs..."):
+        errors = metrics_cache.refresh(resource_ids)
+    if errors:
+        st.warning(f"Metrics could not be fetched for {len(errors)} VMs.")
+
+    cpu = metrics_cache.frame(resource_ids, CPU)
+    memory = metrics_cache.frame(resource_ids, MEMORY)
+    if cpu.empty:
+        st.warning("No CPU data found.")
+        return
+
+    st.subheader("Fleet CPU Usage (%) Last 30 mins")
+    st.line_chart(pd.DataFrame({"Average": cpu.mean(axis=1), "Peak": cpu.max(axis=1)}))
+    summary = pd.DataFrame({
+        "Average CPU %": cpu.mean(),
+        "Latest CPU %": cpu.ffill().iloc[-1],
+        "Average Available Memory %": memory.mean() if not memory.empty else None,
+    }).sort_values("Average CPU %", ascending=False).round(2).rename(index=vm_label)
+    st.dataframe(summary, use_container_width=True)
+    st.write(f"Fleet Average CPU Usage: {cpu.stack().mean():.2f}%")
+
+# Start/stop/restart run in the background; the page only queues them and polls status
+@st.cache_resource
+def get_operation_queue():
+    return OperationQueue()
+
+# Fleet table with filters, bulk actions and metrics for the listed VMs
+def show_fleet_overview(subscription_id, resource_group):
+    scope = st.radio("Show VMs in", ["Selected Resource Group", "Whole Subscription"], horizontal=True)
+    if scope == "Selected Resource Group" and not resource_group:
+        st.info("Please select a Resource Group, or choose Whole Subscription.")
+        return
+    fleet = get_vm_fleet(subscription_id, resource_group if scope == "Selected Resource Group" else None)
+    if not fleet:
+        st.info("No VMs found.")
+        return
+    states = sorted({row["Power State"] for row in fleet})
+    col1, col2, col3 = st.columns([2, 2, 1])
+    name_filter = col1.text_input("Filter by name or tag")
+    state_filter = col2.multiselect("Power State", states, default=states)
+    if col3.button("Reload Fleet"):
+        get_vm_fleet.clear()
+        get_hierarchy().invalidate(subscription_id)
+        st.rerun()
+    rows = [
+        row for row in fleet
+        if row["Power State"] in state_filter
+        and (not name_filter or name_filter.lower() in (row["Name"] + " " + row["Tags"]).lower())
+    ]
+    st.caption(f"{len(rows)} of {len(fleet)} VMs | " + ", ".join(
+        f"{state}: {sum(row['Power State'] == state for row in fleet)}" for state in states))
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+
+    col1, col2 = st.columns([1, 2])
+    bulk_action = col1.selectbox("Bulk Action", list(ACTIONS), format_func=str.title)
+    confirm = col2.checkbox(f"Yes, {bulk_action} all {len(rows)} VMs listed above")
+    if st.button("Apply to Listed VMs", disabled=not (confirm and rows)):
+        targets = [(subscription_id, row["Resource Group"], row["Name"]) for row in rows]
+        queued, busy = get_operation_queue().submit_many(targets, bulk_action)
+        st.success(f"Queued {len(queued)} {bulk_action} operations. Track them under VM Operations below.")
+        if busy:
+            st.warning(f"Skipped {len(busy)} VMs that already have an operation in progress.")
+
+    if st.button("Refresh Metrics for Listed VMs", disabled=not rows):
+        show_fleet_metrics([vm_resource_id(subscription_id, row["Resource Group"], row["Name"]) for row in rows])
+
+st.title("Azure VM Monitor and Control")
+
+hierarchy = get_hierarchy()
+tenant_ids = hierarchy.tenant_ids()
+tenant_id = st.selectbox("Select Tenant ID", options=tenant_ids)
+
+sub_name_to_id = dict(hierarchy.subscriptions())
+subscription_name = st.selectbox("Select Subscription", options=list(sub_name_to_id.keys()))
+
+if subscription_name:
+    subscription_id = sub_name_to_id[subscription_name]
+
+    rg_names = hierarchy.resource_groups(subscription_id)
+    resource_group = st.selectbox("Select Resource Group", rg_names)
+
+    # Listing the fleet is a subscription-wide call, so it only runs while switched on
+    if st.toggle("Show Fleet Overview"):
+        show_fleet_overview(subscription_id, resource_group)
+
+    if resource_group:
+        vm_names = hierarchy.vm_names(subscription_id, resource_group)
+        vm_name = st.selectbox("Select VM", vm_names)
+
+        if vm_name:
+            compute_client = get_client(ComputeManagementClient, subscription_id)
+
+            power_state, tags = get_vm_power_state_and_tags(compute_client, resource_group, vm_name)
+            st.markdown(f"### VM Power State: **{power_state}**")
+            st.markdown("### VM Tags:")
+            if tags:
+                for k, v in tags.items():
+                    st.write(f"- **{k}**: {v}")
+            else:
+                st.write("No tags available.")
+
+            col1, col2, col3 = st.columns(3)
+            operation_queue = get_operation_queue()
+            action = None
+            if col1.button("Start VM"):
+                action = "start"
+            if col2.button("Stop VM"):
+                action = "stop"
+            if col3.button("Restart VM"):
+                action = "restart"
+            if action:
+                job, queued = operation_queue.submit(subscription_id, resource_group, vm_name, action)
+                if queued:
+                    st.success(f"{action.title()} command sent! (job #{job.job_id})")
+                else:
+                    st.warning(f"Skipped: {vm_name} is busy with a {job.action} operation "
+                               f"(job #{job.job_id}, {job.status.lower()}).")
+
+            if st.button("Refresh CPU and Memory Metrics"):
+                resource_id = vm_resource_id(subscription_id, resource_group, vm_name)
+                metrics_cache = get_metrics_cache()
+                errors = metrics_cache.refresh([resource_id])
+                if errors:
+                    st.error(f"Error fetching metrics: {errors[resource_id]}")
+                cpu_data = metrics_cache.frame([resource_id], CPU)
+                mem_data = metrics_cache.frame([resource_id], MEMORY)
+                if not cpu_data.empty:
+                    st.subheader("CPU Usage (%) Last 30 mins")
+                    st.line_chart(cpu_data.rename(columns={resource_id: vm_name}))
+                    st.write(f"Average CPU Usage: {cpu_data[resource_id].mean():.2f}%")
+                else:
+                    st.warning("No CPU data found.")
+
+                if not mem_data.empty:
+                    st.subheader("Available Memory (%) Last 30 mins")
+                    st.line_chart(mem_data.rename(columns={resource_id: vm_name}))
+                    st.write(f"Average Available Memory: {mem_data[resource_id].mean():.2f}%")
+                else:
+                    st.warning("No Memory data found.")
+        else:
+            st.info("Please select a VM to see details and controls.")
+    else:
+        st.info("Please select a Resource Group to proceed.")
+else:
+    st.info("Please select a Subscription to proceed.")
+    
+# Status of queued and running VM operations from every console session
+jobs = get_operation_queue().jobs()
+if jobs:
+    st.header("VM Operations")
+    finished = sum(job.done for job in jobs)
+    st.progress(finished / len(jobs), text=f"{finished} of {len(jobs)} operations finished")
+    st.dataframe([job.as_row() for job in jobs], hide_index=True, use_container_width=True)
+    col1, col2 = st.columns(2)
+    if col1.button("Refresh Status"):
+        st.rerun()
+    if col2.button("Clear Finished"):
+        get_operation_queue().clear_finished()
+        st.rerun()
+
+st.markdown("---")
 st.caption("Powered by TCS | Developed by Cloud Exponence")
\ No newline at end of file
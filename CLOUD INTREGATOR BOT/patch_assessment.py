@@ -0,0 +1,99 @@
+from azure.mgmt.compute import ComputeManagementClient
+from azure_clients import get_client
+from job_queue import MAX_BACKGROUND_JOBS, JobQueue, VmJob, error_text
+from vm_operations import MAX_RUNNING_OPERATIONS
+from tag_index import TagIndex
+
+# Patch assessments allowed to run at the same time in one fleet run
+DEFAULT_CONCURRENCY = 8
+# Patch assessments running at the same time across every run; the rest of
+# the shared pool stays free for VM operations
+MAX_CONCURRENCY = MAX_BACKGROUND_JOBS - MAX_RUNNING_OPERATIONS
+
+
+# Plain dict copy of a VirtualMachineAssessPatchesResult, safe to keep after the poller is gone
+def assessment_summary(result):
+    return {
+        "started_at": result.start_date_time,
+        "status": result.status,
+        "critical_and_security": result.critical_and_security_patch_count or 0,
+        "other": result.other_patch_count or 0,
+        "reboot_pending": bool(result.reboot_pending),
+        "patches": [
+            {
+                "name": patch.name or "Unknown",
+                "kb_id": patch.kb_id,
+                "classifications": list(patch.classifications or []),
+                "published": patch.published_date,
+            }
+            for patch in result.available_patches or []
+        ],
+    }
+
+
+# (subscription_id, resource_group, vm_name) targets for a resource group or a whole
+# subscription, optionally narrowed to VMs whose tags match tag_conditions
+def list_vm_targets(subscription_id, resource_group=None, tag_conditions=None, mode="and"):
+    compute_client = get_client(ComputeManagementClient, subscription_id)
+    if resource_group:
+        vms = list(compute_client.virtual_machines.list(resource_group))
+    else:
+        vms = list(compute_client.virtual_machines.list_all())
+    if tag_conditions:
+        matched = TagIndex([{"tags": vm.tags} for vm in vms]).query(tag_conditions, mode)
+        vms = [vm for position, vm in enumerate(vms) if position in matched]
+    return [(subscription_id, vm.id.split("/")[4], vm.name) for vm in vms]
+
+
+class PatchAssessment(VmJob):
+    def __init__(self, job_id, subscription_id, resource_group, vm_name):
+        super().__init__(job_id, subscription_id, resource_group, vm_name)
+        self.summary = None
+
+    # One compliance table row; counts stay empty until the assessment finishes
+    def as_row(self):
+        summary = self.summary or {}
+        return {
+            "VM": self.vm_name,
+            "Resource Group": self.resource_group,
+            "Status": self.status,
+            "Compliant": (summary["critical_and_security"] == 0) if summary else None,
+            "Critical/Security": summary.get("critical_and_security"),
+            "Other": summary.get("other"),
+            "Reboot Pending": summary.get("reboot_pending"),
+            "Elapsed (s)": round(self.elapsed),
+            "Error": self.error or "",
+        }
+
+
+# Runs begin_assess_patches for many VMs on the shared job pool, at most the
+# requested concurrency per run. A VM that is already being assessed keeps
+# its job, so page reruns never start a second one. With a PatchHistory
+# every successful assessment is also recorded there.
+class PatchAssessmentRunner(JobQueue):
+    max_running = MAX_CONCURRENCY
+
+    def __init__(self, history=None):
+        super().__init__()
+        self.history = history
+
+    # Assess every (subscription_id, resource_group, vm_name) target, at most
+    # max_concurrency at a time; returns the jobs in target order
+    def run(self, targets, max_concurrency=DEFAULT_CONCURRENCY):
+        results = self.submit_batch(targets, PatchAssessment, min(max_concurrency, MAX_CONCURRENCY))
+        return [job for job, _ in results]
+
+    def perform(self, job):
+        compute_client = get_client(ComputeManagementClient, job.subscription_id)
+        result = compute_client.virtual_machines.begin_assess_patches(
+            resource_group_name=job.resource_group, vm_name=job.vm_name).result()
+        job.summary = assessment_summary(result)
+
+    # Saved once the assessment has succeeded, so a history error never fails it
+    def on_success(self, job):
+        if self.history is None:
+            return
+        try:
+            self.history.record(job.subscription_id, job.resource_group, job.vm_name, job.summary)
+        except Exception as e:
+            job.error = f"Assessment not saved to history: {error_text(e)}"
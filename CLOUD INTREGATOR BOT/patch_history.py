@@ -0,0 +1,142 @@
+import time
+import pandas as pd
+from sqlite_store import connect, create_store
+
+HISTORY_PATH = "patch_data/patch_history.db"
+
+# Upper bounds (days since publication) of the patch age buckets
+AGE_BUCKETS = [7, 30, 90, 180, 365]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    vm_key TEXT NOT NULL,           -- lower-cased subscription/resource group/vm
+    subscription_id TEXT NOT NULL,
+    resource_group TEXT NOT NULL,
+    vm_name TEXT NOT NULL,
+    assessed_at REAL NOT NULL,      -- Unix time the assessment finished
+    started_at TEXT,
+    status TEXT,
+    critical_and_security INTEGER NOT NULL,
+    other INTEGER NOT NULL,
+    reboot_pending INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assessments_by_vm ON assessments (vm_key, assessed_at);
+CREATE TABLE IF NOT EXISTS patches (
+    assessment_id INTEGER NOT NULL REFERENCES assessments (id),
+    name TEXT NOT NULL,
+    kb_id TEXT,
+    classifications TEXT NOT NULL,  -- comma separated
+    published REAL                  -- Unix time, NULL when Azure did not report it
+);
+CREATE INDEX IF NOT EXISTS patches_by_assessment ON patches (assessment_id);
+CREATE INDEX IF NOT EXISTS patches_by_kb ON patches (kb_id);
+CREATE TABLE IF NOT EXISTS latest (
+    vm_key TEXT PRIMARY KEY,
+    assessment_id INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def vm_key(subscription_id, resource_group, vm_name):
+    return f"{subscription_id}/{resource_group}/{vm_name}".lower()
+
+
+def _epoch(value):
+    return pd.Timestamp(value).timestamp() if value is not None else None
+
+
+# "KB5034441", "kb5034441" and "5034441" all name the same update
+def normalize_kb(kb):
+    kb = kb.strip().upper()
+    return kb[2:] if kb.startswith("KB") else kb
+
+
+# Every finished patch assessment as structured rows in SQLite. The latest
+# table points at each VM's newest assessment, so fleet questions read one
+# row per VM instead of scanning the whole history.
+class PatchHistory:
+    def __init__(self, path=HISTORY_PATH):
+        create_store(path)
+        self.path = path
+        with connect(path) as conn:
+            conn.executescript(SCHEMA)
+
+    # Store one assessment summary (see patch_assessment.assessment_summary)
+    def record(self, subscription_id, resource_group, vm_name, summary, assessed_at=None):
+        key = vm_key(subscription_id, resource_group, vm_name)
+        assessed_at = assessed_at or time.time()
+        with connect(self.path) as conn:
+            cursor = conn.execute(
+                "INSERT INTO assessments (vm_key, subscription_id, resource_group, vm_name, assessed_at, started_at, "
+                "status, critical_and_security, other, reboot_pending) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, subscription_id, resource_group, vm_name, assessed_at,
+                 str(summary["started_at"]) if summary["started_at"] else None, summary["status"],
+                 summary["critical_and_security"], summary["other"], int(summary["reboot_pending"])))
+            assessment_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO patches VALUES (?, ?, ?, ?, ?)",
+                [(assessment_id, patch["name"], normalize_kb(patch["kb_id"]) if patch["kb_id"] else None,
+                  ",".join(patch["classifications"]), _epoch(patch["published"]))
+                 for patch in summary["patches"]])
+            conn.execute(
+                "INSERT INTO latest VALUES (?, ?) ON CONFLICT (vm_key) DO UPDATE SET assessment_id = excluded.assessment_id "
+                "WHERE excluded.assessment_id > latest.assessment_id",
+                (key, assessment_id))
+        return assessment_id
+
+    def _frame(self, sql, params=()):
+        with connect(self.path) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    # Newest assessment of every VM, optionally limited to one subscription
+    def fleet_compliance(self, subscription_id=None):
+        frame = self._frame(
+            "SELECT a.vm_name AS VM, a.resource_group AS \"Resource Group\", a.subscription_id AS Subscription, "
+            "a.critical_and_security = 0 AS Compliant, a.critical_and_security AS \"Critical/Security\", "
+            "a.other AS Other, a.reboot_pending AS \"Reboot Pending\", a.assessed_at AS \"Assessed At\" "
+            "FROM latest l JOIN assessments a ON a.id = l.assessment_id "
+            "WHERE ? IS NULL OR a.subscription_id = ? ORDER BY a.critical_and_security DESC, a.vm_name",
+            (subscription_id, subscription_id))
+        frame["Compliant"] = frame["Compliant"].astype(bool)
+        frame["Reboot Pending"] = frame["Reboot Pending"].astype(bool)
+        frame["Assessed At"] = pd.to_datetime(frame["Assessed At"], unit="s", utc=True)
+        return frame
+
+    # Pending patches on the fleet's newest assessments, counted by days since publication
+    def patch_age_distribution(self, subscription_id=None):
+        ages = self._frame(
+            "SELECT (? - p.published) / 86400.0 AS age FROM latest l "
+            "JOIN assessments a ON a.id = l.assessment_id JOIN patches p ON p.assessment_id = a.id "
+            "WHERE p.published IS NOT NULL AND (? IS NULL OR a.subscription_id = ?)",
+            (time.time(), subscription_id, subscription_id))["age"]
+        edges = [0] + AGE_BUCKETS + [float("inf")]
+        labels = [f"{lo}-{hi} days" for lo, hi in zip(edges, AGE_BUCKETS)] + [f"over {AGE_BUCKETS[-1]} days"]
+        buckets = pd.cut(ages.clip(lower=0), bins=edges, labels=labels, include_lowest=True)
+        return buckets.value_counts().reindex(labels, fill_value=0).rename("Patches")
+
+    # VMs whose newest assessment still lists the given KB ("KB5034441" or "5034441"),
+    # or, for anything that is not a KB number, a patch whose name contains it
+    def vms_missing(self, kb, subscription_id=None):
+        kb_number = normalize_kb(kb)
+        if kb_number.isdigit():
+            match, param = "p.kb_id = ?", kb_number
+        else:
+            match, param = "p.name LIKE ?", f"%{kb.strip()}%"
+        return self._frame(
+            "SELECT a.vm_name AS VM, a.resource_group AS \"Resource Group\", a.subscription_id AS Subscription, "
+            "p.name AS Patch, p.classifications AS Classifications FROM patches p "
+            "JOIN latest l ON l.assessment_id = p.assessment_id JOIN assessments a ON a.id = p.assessment_id "
+            f"WHERE {match} AND (? IS NULL OR a.subscription_id = ?) ORDER BY a.vm_name",
+            (param, subscription_id, subscription_id))
+
+    # Every stored assessment of one VM, newest first
+    def vm_history(self, subscription_id, resource_group, vm_name):
+        frame = self._frame(
+            "SELECT assessed_at AS \"Assessed At\", status AS Status, critical_and_security AS \"Critical/Security\", "
+            "other AS Other, reboot_pending AS \"Reboot Pending\" FROM assessments "
+            "WHERE vm_key = ? ORDER BY assessed_at DESC",
+            (vm_key(subscription_id, resource_group, vm_name),))
+        frame["Assessed At"] = pd.to_datetime(frame["Assessed At"], unit="s", utc=True)
+        frame["Reboot Pending"] = frame["Reboot Pending"].astype(bool)
+        return frame
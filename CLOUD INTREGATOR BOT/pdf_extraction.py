@@ -0,0 +1,54 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import fitz  # PyMuPDF
+
+EXTRACT_WORKERS = os.cpu_count() or 1
+# Pages one worker extracts per task
+PAGES_PER_TASK = 16
+# Below this many pages, starting worker processes costs more than it saves
+MIN_PARALLEL_PAGES = 64
+
+# The PDF each worker process opened in _open_worker
+_document = None
+
+
+def _open_worker(data):
+    global _document
+    _document = fitz.open(stream=data, filetype="pdf")
+
+
+def _extract_range(start, stop):
+    return [_document[number].get_text() for number in range(start, stop)]
+
+
+def page_count(data):
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return doc.page_count
+
+
+# (page number from 1, text) for every page of the PDF bytes, in page order.
+# Large documents are split into page ranges extracted by a process pool;
+# the PDF is sent to each worker once and pages are yielded as soon as
+# their range is done, so chunking and embedding can start right away.
+def extract_pages(data, max_workers=EXTRACT_WORKERS, pages_per_task=PAGES_PER_TASK):
+    count = page_count(data)
+    if max_workers <= 1 or count < MIN_PARALLEL_PAGES:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            for number, page in enumerate(doc, 1):
+                yield number, page.get_text()
+        return
+
+    ranges = [(start, min(start + pages_per_task, count)) for start in range(0, count, pages_per_task)]
+    # Spawned, not forked: forking the threaded Streamlit server (with torch and
+    # tokenizer threads running) can deadlock, and spawn is what Windows does anyway
+    pool = ProcessPoolExecutor(max_workers=min(max_workers, len(ranges)), mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_open_worker, initargs=(data,))
+    try:
+        futures = [pool.submit(_extract_range, start, stop) for start, stop in ranges]
+        for (start, _), future in zip(ranges, futures):
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, text
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import pickle
+import re
+import shutil
+import threading
+import faiss
+from langchain_community.vectorstores.faiss import FAISS
+
+INDEX_FOLDER = "rag_data/indexes"
+
+# Total size the saved indexes may take; least recently used ones go first
+DISK_BUDGET = 1024 * 1024 * 1024
+
+# Files FAISS.save_local writes into an index folder
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+
+
+def document_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# Folder name for a document embedded with a given model (and chunking settings)
+def index_key(doc_hash, model_name, variant=""):
+    name = f"{model_name}-{variant}" if variant else model_name
+    return f"{doc_hash[:32]}-{re.sub(r'[^A-Za-z0-9.-]+', '_', name)}"
+
+
+def _folder_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+# Read the FAISS index memory-mapped where this faiss build supports it, so
+# a large index is paged in on demand instead of copied into memory
+def _read_index(path):
+    flags = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    try:
+        return faiss.read_index(path, flags)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+
+# FAISS vector stores saved on disk under (document hash, embedding model),
+# so a contract seen before, by any session or after a restart, is never
+# embedded again. The folder mtime records the last use for LRU eviction.
+class IndexCache:
+    def __init__(self, folder=INDEX_FOLDER, budget=DISK_BUDGET):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.budget = budget
+        self._lock = threading.Lock()
+
+    def path_for(self, key):
+        return os.path.join(self.folder, key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self.path_for(key), INDEX_FILE))
+
+    # Saved vector store for key, or None when it has not been built yet
+    def load(self, key, embeddings):
+        path = self.path_for(key)
+        if key not in self:
+            return None
+        try:
+            index = _read_index(os.path.join(path, INDEX_FILE))
+            with open(os.path.join(path, DOCSTORE_FILE), "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+        except (OSError, RuntimeError):
+            # Evicted by another session while it was being read
+            if key in self:
+                raise
+            return None
+        os.utime(path)
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    # Save next to the others (atomically, via a temporary folder) and evict down to the budget
+    def save(self, key, vector_store):
+        path = self.path_for(key)
+        tmp_path = f"{path}.tmp{threading.get_ident()}"
+        vector_store.save_local(tmp_path)
+        with self._lock:
+            if os.path.exists(path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            else:
+                os.replace(tmp_path, path)
+            self.evict(keep=key)
+
+    # Remove least recently used indexes until the folder fits the budget
+    def evict(self, keep=None):
+        entries = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if os.path.isdir(path) and ".tmp" not in name:
+                entries.append((os.path.getmtime(path), name, _folder_size(path)))
+        total = sum(size for _, _, size in entries)
+        for _, name, size in sorted(entries):
+            if total <= self.budget:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.folder, name), ignore_errors=True)
+            total -= size
+
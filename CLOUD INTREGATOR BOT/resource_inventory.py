@@ -0,0 +1,228 @@
+import gzip
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from azure_fanout import fan_out
+from tag_index import TagIndex
+
+# Where the tenant inventory snapshot lives and how long it stays fresh
+INVENTORY_FOLDER = "inventory_data"
+INVENTORY_TTL = 15 * 60
+
+FIELDS = ["id", "name", "type", "resource_group", "subscription_id", "location", "tags"]
+# Low-cardinality columns are stored once per distinct value plus an integer code
+ENCODED_FIELDS = ["type", "resource_group", "subscription_id", "location"]
+
+
+def extract_resource_group(resource_id):
+    parts = resource_id.split('/')
+    try:
+        rg_index = parts.index('resourceGroups') + 1
+        return parts[rg_index]
+    except (ValueError, IndexError):
+        return None
+
+
+def resource_record(resource, subscription_id):
+    return {
+        "id": resource.id,
+        "name": resource.name,
+        "type": resource.type,
+        "resource_group": extract_resource_group(resource.id),
+        "subscription_id": subscription_id,
+        "location": resource.location,
+        "tags": resource.tags or {},
+    }
+
+
+def _encode(values):
+    codes, distinct = [], {}
+    for value in values:
+        codes.append(distinct.setdefault(value, len(distinct)))
+    return {"values": list(distinct), "codes": codes}
+
+
+def _decode(column):
+    return [column["values"][code] for code in column["codes"]]
+
+
+# Immutable set of resource records with the name lookups built over it
+class InventorySnapshot:
+    def __init__(self, records, refreshed_at, failed_subscriptions=()):
+        self.records = records
+        self.refreshed_at = refreshed_at
+        self.failed_subscriptions = list(failed_subscriptions)
+
+        names = [record["name"].lower() for record in records]
+        self._by_name = {}
+        for position, name in enumerate(names):
+            self._by_name.setdefault(name, []).append(position)
+        self._sorted_names = sorted((name, position) for position, name in enumerate(names))
+        self._sorted_keys = [name for name, _ in self._sorted_names]
+        # All names in one string so substring search is a C-level str.find loop
+        self._blob = "\n".join(names)
+        self._line_starts = []
+        offset = 0
+        for name in names:
+            self._line_starts.append(offset)
+            offset += len(name) + 1
+        self.tag_index = TagIndex(records)
+
+    def _exact(self, query):
+        return self._by_name.get(query, [])
+
+    def _prefix(self, query):
+        lo = bisect_left(self._sorted_keys, query)
+        hi = bisect_right(self._sorted_keys, query + "\uffff")
+        return [position for _, position in self._sorted_names[lo:hi]]
+
+    def _substring(self, query):
+        positions = []
+        found = self._blob.find(query)
+        while found != -1:
+            position = bisect_right(self._line_starts, found) - 1
+            positions.append(position)
+            # Continue from the next name so each resource is reported once
+            next_start = self._line_starts[position + 1] if position + 1 < len(self._line_starts) else len(self._blob)
+            found = self._blob.find(query, next_start)
+        return positions
+
+    # mode is "exact", "prefix" or "contains"; matching ignores case
+    def find_by_name(self, query, mode="exact", subscription_ids=None, limit=None):
+        query = query.strip().lower()
+        if not query or "\n" in query:
+            return []
+        positions = {"exact": self._exact, "prefix": self._prefix, "contains": self._substring}[mode](query)
+        wanted = set(subscription_ids) if subscription_ids else None
+        matches = []
+        for position in positions:
+            record = self.records[position]
+            if wanted is None or record["subscription_id"] in wanted:
+                matches.append(record)
+                if limit and len(matches) >= limit:
+                    break
+        return matches
+
+    # Records matching a list of TagConditions combined with "and" / "or"
+    def find_by_tags(self, conditions, mode="and", subscription_ids=None):
+        wanted = set(subscription_ids) if subscription_ids else None
+        return [
+            self.records[position] for position in sorted(self.tag_index.query(conditions, mode))
+            if wanted is None or self.records[position]["subscription_id"] in wanted
+        ]
+
+    def to_file(self, path):
+        columns = {field: [record[field] for record in self.records] for field in FIELDS}
+        for field in ENCODED_FIELDS:
+            columns[field] = _encode(columns[field])
+        payload = {"refreshed_at": self.refreshed_at, "failed_subscriptions": self.failed_subscriptions,
+                   "columns": columns}
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+            json.dump(payload, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_file(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            payload = json.load(file)
+        columns = payload["columns"]
+        for field in ENCODED_FIELDS:
+            columns[field] = _decode(columns[field])
+        records = [dict(zip(FIELDS, row)) for row in zip(*(columns[field] for field in FIELDS))]
+        return cls(records, payload["refreshed_at"], payload.get("failed_subscriptions", []))
+
+
+# Tenant-wide resource inventory: loaded from disk at start, refreshed in a
+# background thread once older than ttl, and swapped in whole so readers
+# never see a half-built snapshot. subscription_ids is called on every
+# refresh, so subscriptions granted or removed later are picked up.
+class ResourceInventory:
+    def __init__(self, subscription_ids, list_resources, folder=INVENTORY_FOLDER, ttl=INVENTORY_TTL):
+        os.makedirs(folder, exist_ok=True)
+        self.subscription_ids = subscription_ids
+        self.list_resources = list_resources
+        self.path = os.path.join(folder, "resources.json.gz")
+        self.ttl = ttl
+        self.snapshot = None
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._refresh_thread = None
+        self._loaded = threading.Event()
+        if os.path.exists(self.path):
+            try:
+                self.snapshot = InventorySnapshot.from_file(self.path)
+                self._loaded.set()
+            except (OSError, ValueError, KeyError) as e:
+                self.last_error = e
+
+    @property
+    def refreshing(self):
+        return self._refresh_thread is not None and self._refresh_thread.is_alive()
+
+    def age(self):
+        return time.time() - self.snapshot.refreshed_at if self.snapshot else None
+
+    def is_stale(self):
+        return self.snapshot is None or self.age() > self.ttl
+
+    # List every subscription concurrently and swap in the new snapshot.
+    # Subscriptions that fail keep their records from the previous snapshot.
+    def refresh(self):
+        with self._refresh_lock:
+            records, failed, last_error = [], [], None
+            for sub_id, resources, error in fan_out(self.list_resources, list(self.subscription_ids())):
+                if error:
+                    failed.append(sub_id)
+                    last_error = error
+                    continue
+                records.extend(resource_record(resource, sub_id) for resource in resources)
+            if failed and self.snapshot:
+                failed_ids = set(failed)
+                records.extend(record for record in self.snapshot.records if record["subscription_id"] in failed_ids)
+
+            snapshot = InventorySnapshot(records, time.time(), failed)
+            snapshot.to_file(self.path)
+            self.snapshot = snapshot
+            # Only the latest refresh's failures are reported
+            self.last_error = last_error
+            self._loaded.set()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self.last_error = e
+        finally:
+            self._loaded.set()
+
+    # Start a background refresh unless one is already running
+    def refresh_async(self):
+        with self._thread_lock:
+            if not self.refreshing:
+                self._refresh_thread = threading.Thread(target=self._refresh_in_background, daemon=True)
+                self._refresh_thread.start()
+
+    # Kick off a background refresh when stale; only blocks (up to timeout)
+    # when there is no snapshot at all yet
+    def ensure_fresh(self, timeout=None):
+        if self.is_stale():
+            self.refresh_async()
+        if self.snapshot is None:
+            self._loaded.wait(timeout)
+        return self.snapshot
+
+    def find_by_name(self, query, mode="exact", subscription_ids=None, limit=None):
+        snapshot = self.snapshot
+        if snapshot is None:
+            return []
+        return snapshot.find_by_name(query, mode, subscription_ids, limit)
+
+    def find_by_tags(self, conditions, mode="and", subscription_ids=None):
+        snapshot = self.snapshot
+        if snapshot is None:
+            return []
+        return snapshot.find_by_tags(conditions, mode, subscription_ids)
@@ -0,0 +1,29 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# Seconds a connection waits for another writer's lock before failing
+BUSY_TIMEOUT = 30
+
+
+# One connection per call so worker threads can write concurrently; the
+# block runs as one transaction. durable=False skips the full fsync on
+# commit, for data that can always be rebuilt.
+@contextmanager
+def connect(path, durable=True):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    if not durable:
+        conn.execute("PRAGMA synchronous=NORMAL")
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+# Create the database (and its folder) in WAL mode, so readers never block
+# the writer
+def create_store(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
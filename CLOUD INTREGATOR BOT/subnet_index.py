@@ -0,0 +1,157 @@
+import ipaddress
+from bisect import bisect_left, bisect_right, insort
+
+MAX_PREFIX = 32
+
+
+# Split the address range [start, end) into the fewest aligned CIDR blocks
+def split_range(start: int, end: int) -> list[tuple[int, int]]:
+    blocks = []
+    while start < end:
+        size = start & -start if start else 1 << MAX_PREFIX
+        while size > end - start:
+            size >>= 1
+        blocks.append((start, MAX_PREFIX - size.bit_length() + 1))
+        start += size
+    return blocks
+
+
+# Free-space index for one base network.
+# Free space is kept as maximal aligned blocks, one sorted list of block
+# starts per prefix length, so a lookup only has to look at list heads.
+class SubnetIndex:
+    def __init__(self, base_network: ipaddress.IPv4Network, allocated=()):
+        self.base_network = base_network
+        self._base_start = int(base_network.network_address)
+        self._base_end = self._base_start + base_network.num_addresses
+        self._free = [[] for _ in range(MAX_PREFIX + 1)]
+
+        cursor = self._base_start
+        for start, end in self._merged_ranges(allocated):
+            self._add_range(cursor, start)
+            cursor = max(cursor, end)
+        self._add_range(cursor, self._base_end)
+
+    # Sorted, merged [start, end) ranges of allocations clipped to the base network
+    def _merged_ranges(self, allocated):
+        ranges = []
+        for network in allocated:
+            start = max(int(network.network_address), self._base_start)
+            end = min(int(network.network_address) + network.num_addresses, self._base_end)
+            if start < end:
+                ranges.append((start, end))
+        ranges.sort()
+
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def _add_range(self, start: int, end: int):
+        for block_start, prefix in split_range(start, end):
+            insort(self._free[prefix], block_start)
+
+    # Pick the free block to carve a /prefix from, without modifying the index
+    def _pick(self, prefix: int, strategy: str):
+        if strategy == "best":
+            for block_prefix in range(prefix, -1, -1):
+                if self._free[block_prefix]:
+                    return self._free[block_prefix][0], block_prefix
+            return None
+        if strategy != "first":
+            raise ValueError(f"Unknown allocation strategy: {strategy}")
+
+        best = None
+        for block_prefix in range(prefix + 1):
+            blocks = self._free[block_prefix]
+            if blocks and (best is None or blocks[0] < best[0]):
+                best = (blocks[0], block_prefix)
+        return best
+
+    # Return the subnet that allocate() would hand out, or None if nothing fits.
+    # "first" is the lowest free address (the old linear scan's answer),
+    # "best" is the lowest address inside the smallest block that fits.
+    def find(self, prefix: int, strategy: str = "first") -> ipaddress.IPv4Network | None:
+        if prefix < self.base_network.prefixlen or prefix > MAX_PREFIX:
+            return None
+        picked = self._pick(prefix, strategy)
+        if picked is None:
+            return None
+        return ipaddress.IPv4Network((picked[0], prefix))
+
+    # Take the next /prefix out of the free space
+    def allocate(self, prefix: int, strategy: str = "first") -> ipaddress.IPv4Network | None:
+        subnet = self.find(prefix, strategy)
+        if subnet is not None:
+            self.reserve(subnet)
+        return subnet
+
+    # Mark a subnet as used, whatever free blocks it overlaps
+    def reserve(self, network: ipaddress.IPv4Network):
+        start = max(int(network.network_address), self._base_start)
+        end = min(int(network.network_address) + network.num_addresses, self._base_end)
+        if start >= end:
+            return
+
+        leftovers = []
+        for prefix, blocks in enumerate(self._free):
+            size = 1 << (MAX_PREFIX - prefix)
+            lo = bisect_right(blocks, start - size)
+            hi = bisect_left(blocks, end)
+            for block_start in blocks[lo:hi]:
+                leftovers.append((block_start, min(start, block_start + size)))
+                leftovers.append((max(end, block_start), block_start + size))
+            del blocks[lo:hi]
+
+        for left, right in leftovers:
+            self._add_range(left, right)
+
+    def is_free(self, network: ipaddress.IPv4Network) -> bool:
+        start = int(network.network_address)
+        if start < self._base_start or start + network.num_addresses > self._base_end:
+            return False
+        for prefix in range(network.prefixlen + 1):
+            blocks = self._free[prefix]
+            i = bisect_right(blocks, start) - 1
+            if i >= 0 and start < blocks[i] + (1 << (MAX_PREFIX - prefix)):
+                return True
+        return False
+
+    def copy(self) -> "SubnetIndex":
+        clone = SubnetIndex.__new__(SubnetIndex)
+        clone.base_network = self.base_network
+        clone._base_start = self._base_start
+        clone._base_end = self._base_end
+        clone._free = [list(blocks) for blocks in self._free]
+        return clone
+
+    def free_addresses(self) -> int:
+        return sum(len(blocks) << (MAX_PREFIX - prefix) for prefix, blocks in enumerate(self._free))
+
+    # Prefix length of the largest free block, or None when the range is full
+    def largest_free_prefix(self) -> int | None:
+        return next((prefix for prefix, blocks in enumerate(self._free) if blocks), None)
+
+    # Number of /prefix subnets that could still be carved out of the free space
+    def available(self, prefix: int) -> int:
+        return sum(len(self._free[block_prefix]) << (prefix - block_prefix) for block_prefix in range(prefix + 1))
+
+    # Free blocks of exactly this prefix length
+    def free_block_count(self, prefix: int) -> int:
+        return len(self._free[prefix])
+
+    # 0 when all free space is one block, towards 1 as it splits into small pieces
+    def fragmentation(self) -> float:
+        free = self.free_addresses()
+        if not free:
+            return 0.0
+        return 1 - (1 << (MAX_PREFIX - self.largest_free_prefix())) / free
+
+    # Free blocks as (start address, prefix) pairs in address order
+    def free_blocks(self) -> list[tuple[int, int]]:
+        blocks = [(start, prefix) for prefix, starts in enumerate(self._free) for start in starts]
+        blocks.sort()
+        return blocks
@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right
+
+# The four tags every resource is expected to carry
+STANDARD_TAGS = ["CostCenter-or-OrderNumber", "OwnerEmail", "service", "sponsor"]
+
+
+# One condition of a tag query: key=value, key=prefix*, key (has the tag),
+# any of them negated with a leading "!"
+class TagCondition:
+    def __init__(self, key, value=None, prefix=False, negate=False):
+        self.key = key
+        self.value = value
+        self.prefix = prefix
+        self.negate = negate
+
+    def __repr__(self):
+        value = "" if self.value is None else "=" + self.value + ("*" if self.prefix else "")
+        return ("!" if self.negate else "") + self.key + value
+
+
+# Parse "env=prod, owner=ann*, !service=legacy" into TagConditions
+def parse_tag_query(text):
+    conditions = []
+    for item in text.replace(";", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        negate = item.startswith("!")
+        key, has_value, value = item.lstrip("!").partition("=")
+        key, value = key.strip(), value.strip()
+        if not key:
+            raise ValueError(f"Missing tag name in '{item}'")
+        prefix = value.endswith("*")
+        value = value.rstrip("*")
+        if not has_value or (prefix and not value):
+            conditions.append(TagCondition(key, negate=negate))
+        else:
+            conditions.append(TagCondition(key, value, prefix, negate))
+    return conditions
+
+
+# Inverted index from (tag key, tag value) to record positions.
+# Keys and values are matched case-insensitively; values also support
+# prefix matching through a sorted list of the distinct values per key.
+class TagIndex:
+    def __init__(self, records):
+        self.size = len(records)
+        self._postings = {}
+        for position, record in enumerate(records):
+            for key, value in (record.get("tags") or {}).items():
+                values = self._postings.setdefault(key.lower(), {})
+                values.setdefault(str(value).lower(), set()).add(position)
+        self._sorted_values = {key: sorted(values) for key, values in self._postings.items()}
+
+    def keys(self):
+        return list(self._postings)
+
+    # Positions of records matching one condition, ignoring its negation
+    def match(self, condition):
+        values = self._postings.get(condition.key.lower())
+        if not values:
+            return set()
+        if condition.value is None:
+            return set().union(*values.values())
+
+        value = condition.value.lower()
+        if not condition.prefix:
+            return set(values.get(value, ()))
+        sorted_values = self._sorted_values[condition.key.lower()]
+        lo = bisect_left(sorted_values, value)
+        hi = bisect_right(sorted_values, value + "\uffff")
+        return set().union(*(values[v] for v in sorted_values[lo:hi]))
+
+    # Combine conditions with "and" / "or"; negated conditions always exclude
+    def query(self, conditions, mode="and"):
+        positive = [self.match(c) for c in conditions if not c.negate]
+        negative = [self.match(c) for c in conditions if c.negate]
+
+        if not positive:
+            result = set(range(self.size))
+        elif mode == "and":
+            positive.sort(key=len)
+            result = positive[0].intersection(*positive[1:])
+        elif mode == "or":
+            result = set().union(*positive)
+        else:
+            raise ValueError(f"Unknown query mode: {mode}")
+
+        if negative:
+            result.difference_update(*negative)
+        return result
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+from azure.mgmt.compute import ComputeManagementClient
+from azure.mgmt.monitor import MonitorManagementClient
+from azure_clients import get_client
+from azure_fanout import fan_out
+
+METRIC = "VmAvailabilityMetric"
+HOUR = pd.Timedelta(hours=1)
+
+# An hour averaging below this availability counts as downtime
+DOWN_THRESHOLD = 1.0
+
+
+def vm_name_of(resource_id):
+    return resource_id.rstrip("/").split("/")[-1]
+
+
+# Resource ids of every VM in a resource group, or the whole subscription when rg is empty
+def list_vm_ids(subscription_id, resource_group=None):
+    compute_client = get_client(ComputeManagementClient, subscription_id)
+    if resource_group:
+        vms = compute_client.virtual_machines.list(resource_group)
+    else:
+        vms = compute_client.virtual_machines.list_all()
+    return [vm.id for vm in vms]
+
+
+# Hourly average availability (0..1) for one VM, indexed by UTC hour
+def fetch_availability(resource_id, start, end):
+    monitor_client = get_client(MonitorManagementClient, resource_id.split("/")[2])
+    metrics_data = monitor_client.metrics.list(
+        resource_id,
+        timespan=f"{start.isoformat()}/{end.isoformat()}",
+        interval="PT1H",
+        metricnames=METRIC,
+        aggregation="Average"
+    )
+    times, values = [], []
+    for metric in metrics_data.value:
+        for ts in metric.timeseries:
+            for point in ts.data:
+                if point.average is not None:
+                    times.append(point.time_stamp)
+                    values.append(point.average)
+    return pd.Series(np.asarray(values, dtype=np.float64), index=pd.DatetimeIndex(pd.to_datetime(times, utc=True)))
+
+
+# Fetch many VMs concurrently; returns ({resource_id: series}, {resource_id: error}).
+# With an AvailabilityStore only the days it has not stored yet are fetched.
+def fetch_fleet_availability(resource_ids, start, end, on_progress=None, store=None):
+    if store is not None:
+        return store.sync(resource_ids, start, end, fetch_availability, on_progress)
+    series, errors = {}, {}
+    for done, (resource_id, result, error) in enumerate(fan_out(lambda rid: fetch_availability(rid, start, end), resource_ids), 1):
+        if error:
+            errors[resource_id] = error
+        else:
+            series[resource_id] = result
+        if on_progress:
+            on_progress(done, len(resource_ids))
+    return series, errors
+
+
+def to_utc(value):
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+
+
+def hourly_grid(start, end):
+    return pd.date_range(to_utc(start).floor("h"), to_utc(end), freq="h", inclusive="left")
+
+
+# VMs x hours matrix of availability, NaN where the VM reported nothing
+def availability_matrix(series_by_vm, grid):
+    matrix = np.full((len(series_by_vm), len(grid)), np.nan)
+    for row, series in enumerate(series_by_vm.values()):
+        if len(series):
+            positions = grid.get_indexer(series.index.floor("h"))
+            valid = positions >= 0
+            matrix[row, positions[valid]] = series.to_numpy()[valid]
+    return matrix
+
+
+# Down hours as run-length windows for every VM at once.
+# Returns (vm_rows, start_hours, lengths) as parallel arrays.
+def downtime_windows(matrix, threshold=DOWN_THRESHOLD):
+    down = np.nan_to_num(matrix, nan=1.0) < threshold
+    padded = np.zeros((down.shape[0], down.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = down
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends - starts
+
+
+# Mean over the reported (non-NaN) hours along an axis, NaN where nothing was reported
+def _reported_mean(matrix, axis):
+    reported = np.count_nonzero(~np.isnan(matrix), axis=axis)
+    totals = np.nansum(matrix, axis=axis)
+    return np.divide(totals, reported, out=np.full(totals.shape, np.nan), where=reported > 0), reported
+
+
+# Per-VM SLA table, downtime windows, fleet SLA percentiles and the fleet
+# availability trend, all computed on the VMs x hours matrix in one pass.
+# Hours without data are left out of the SLA rather than counted as down.
+def fleet_report(series_by_vm, start, end, threshold=DOWN_THRESHOLD):
+    grid = hourly_grid(start, end)
+    names = np.asarray([vm_name_of(resource_id) for resource_id in series_by_vm], dtype=object)
+    matrix = availability_matrix(series_by_vm, grid)
+
+    sla, reported = _reported_mean(matrix, axis=1)
+    sla *= 100
+    downtime_minutes = np.nansum((1 - matrix) * 60, axis=1)
+
+    rows, starts, lengths = downtime_windows(matrix, threshold)
+    window_count = np.bincount(rows, minlength=len(names))
+    longest = np.zeros(len(names), dtype=np.int64)
+    np.maximum.at(longest, rows, lengths)
+
+    per_vm = pd.DataFrame({
+        "VM": names,
+        "SLA %": np.round(sla, 3),
+        "Downtime (min)": np.round(downtime_minutes, 1),
+        "Downtime Windows": window_count,
+        "Longest Window (h)": longest,
+        "Hours Reported": reported,
+    }).sort_values(["SLA %", "Downtime (min)"], ascending=[True, False], na_position="last")
+
+    windows = pd.DataFrame({
+        "VM": names[rows],
+        "Start": grid[starts],
+        "End": grid[starts + lengths - 1] + HOUR,
+        "Hours": lengths,
+    }).sort_values("Hours", ascending=False)
+
+    valid = sla[~np.isnan(sla)]
+    percentiles = {}
+    if valid.size:
+        for label, q in [("Median", 50), ("P10", 10), ("P1", 1), ("Worst", 0)]:
+            percentiles[label] = float(np.percentile(valid, q))
+
+    trend, _ = _reported_mean(matrix, axis=0)
+    return {
+        "per_vm": per_vm,
+        "windows": windows,
+        "percentiles": percentiles,
+        "trend": pd.Series(trend * 100, index=grid, name="Fleet Availability %"),
+    }
@@ -0,0 +1,154 @@
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from azure.mgmt.monitor import MonitorManagementClient
+from azure_clients import get_client
+from azure_fanout import fan_out
+from sqlite_store import connect, create_store
+
+CPU = "Percentage CPU"
+MEMORY = "Available Memory Percentage"
+METRIC_NAMES = [CPU, MEMORY]
+
+STORE_PATH = "metrics_data/vm_metrics.db"
+
+INTERVAL = timedelta(minutes=5)
+DEFAULT_WINDOW = timedelta(minutes=30)
+# Cached points older than this are dropped
+RETENTION = timedelta(hours=24)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_points (
+    resource_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    ts INTEGER NOT NULL,            -- nanoseconds since the Unix epoch, UTC
+    value REAL NOT NULL,
+    PRIMARY KEY (resource_id, metric, ts)
+) WITHOUT ROWID;
+"""
+
+
+def subscription_of(resource_id):
+    return resource_id.split("/")[2]
+
+
+# "resource-group/vm-name", short enough for charts and unique within a subscription
+def vm_label(resource_id):
+    parts = resource_id.rstrip("/").split("/")
+    return f"{parts[4]}/{parts[-1]}"
+
+
+# Average CPU and memory points for one VM between start and end, one Series per metric
+def fetch_vm_metrics(resource_id, start, end):
+    monitor_client = get_client(MonitorManagementClient, subscription_of(resource_id))
+    metrics_data = monitor_client.metrics.list(
+        resource_id,
+        timespan=f"{start.isoformat()}/{end.isoformat()}",
+        interval="PT5M",
+        metricnames=",".join(METRIC_NAMES),
+        aggregation="Average"
+    )
+
+    series = {}
+    for item in metrics_data.value:
+        times, values = [], []
+        for ts in item.timeseries:
+            for data in ts.data:
+                if data.average is not None:
+                    times.append(data.time_stamp)
+                    values.append(data.average)
+        index = pd.DatetimeIndex(pd.to_datetime(times, utc=True))
+        series[item.name.value] = pd.Series(np.asarray(values, dtype=np.float64), index=index)
+    return series
+
+
+# Process-wide time-series cache keyed by (resource id, metric) and timestamp,
+# kept in memory and in a local SQLite store so it survives restarts. A
+# refresh asks Azure Monitor only for points from the newest cached one
+# onwards (the last 5-minute bucket may still have been filling), for many
+# VMs concurrently.
+class MetricsCache:
+    def __init__(self, path=STORE_PATH, retention=RETENTION):
+        create_store(path)
+        self.path = path
+        self.retention = retention
+        self._series = {}
+        self._loaded = set()
+        self._lock = threading.Lock()
+        with connect(path) as conn:
+            conn.executescript(SCHEMA)
+
+    # Read a VM's stored points into memory, once per process
+    def _load(self, resource_id):
+        if resource_id in self._loaded:
+            return
+        cutoff = pd.Timestamp(datetime.now(timezone.utc) - self.retention).value
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT metric, ts, value FROM metric_points WHERE resource_id = ? AND ts >= ? ORDER BY metric, ts",
+                (resource_id, cutoff)).fetchall()
+        stored = {}
+        for metric, ts, value in rows:
+            stored.setdefault(metric, ([], []))
+            stored[metric][0].append(ts)
+            stored[metric][1].append(value)
+        with self._lock:
+            for metric, (stamps, values) in stored.items():
+                self._series.setdefault((resource_id, metric), pd.Series(
+                    np.asarray(values, dtype=np.float64), index=pd.DatetimeIndex(stamps, tz="UTC")))
+            self._loaded.add(resource_id)
+
+    def _newest(self, resource_id):
+        stamps = [self._series[(resource_id, metric)].index[-1] for metric in METRIC_NAMES
+                  if len(self._series.get((resource_id, metric), ()))]
+        return min(stamps).to_pydatetime() if stamps else None
+
+    def _merge(self, resource_id, fetched, now):
+        cutoff = pd.Timestamp(now - self.retention)
+        rows = [(resource_id, metric, int(stamp), float(value))
+                for metric, new in fetched.items()
+                for stamp, value in zip(new.index.as_unit("ns").asi8, new.to_numpy())]
+        with connect(self.path) as conn:
+            conn.executemany("INSERT OR REPLACE INTO metric_points VALUES (?, ?, ?, ?)", rows)
+            conn.execute("DELETE FROM metric_points WHERE resource_id = ? AND ts < ?", (resource_id, cutoff.value))
+        with self._lock:
+            for metric, new in fetched.items():
+                old = self._series.get((resource_id, metric))
+                merged = new if old is None else pd.concat([old, new])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+                self._series[(resource_id, metric)] = merged[merged.index >= cutoff]
+
+    # Bring every resource up to date for the last `window`; returns {resource_id: error}
+    def refresh(self, resource_ids, window=DEFAULT_WINDOW):
+        now = datetime.now(timezone.utc)
+
+        def fetch(resource_id):
+            self._load(resource_id)
+            newest = self._newest(resource_id)
+            start = now - window if newest is None else max(newest, now - window)
+            return fetch_vm_metrics(resource_id, start, now)
+
+        errors = {}
+        for resource_id, fetched, error in fan_out(fetch, resource_ids):
+            if error:
+                errors[resource_id] = error
+            else:
+                self._merge(resource_id, fetched, now)
+        return errors
+
+    # One metric for many VMs as a wide frame: timestamp index, one column per
+    # resource id (VM names repeat across resource groups; see vm_label for display)
+    def frame(self, resource_ids, metric, window=DEFAULT_WINDOW):
+        for resource_id in resource_ids:
+            self._load(resource_id)
+        since = pd.Timestamp(datetime.now(timezone.utc) - window)
+        with self._lock:
+            columns = {
+                resource_id: series[series.index >= since]
+                for resource_id in resource_ids
+                if (series := self._series.get((resource_id, metric))) is not None
+            }
+        if not columns:
+            return pd.DataFrame()
+        return pd.DataFrame(columns).sort_index()
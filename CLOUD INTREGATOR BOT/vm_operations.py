@@ -0,0 +1,62 @@
+from azure.mgmt.compute import ComputeManagementClient
+from azure_clients import get_client
+from job_queue import MAX_BACKGROUND_JOBS, JobQueue, VmJob
+
+# Long-running VM operations allowed to run at the same time per bulk action
+MAX_CONCURRENT_OPERATIONS = 10
+# VM operations running at the same time across every bulk action; the rest
+# of the shared pool is left to patch assessments
+MAX_RUNNING_OPERATIONS = MAX_BACKGROUND_JOBS // 2
+
+# Action name -> virtual_machines long-running operation
+ACTIONS = {
+    "start": "begin_start",
+    "stop": "begin_power_off",
+    "restart": "begin_restart",
+    "deallocate": "begin_deallocate",
+}
+
+
+class VmOperation(VmJob):
+    def __init__(self, job_id, subscription_id, resource_group, vm_name, action):
+        super().__init__(job_id, subscription_id, resource_group, vm_name)
+        self.action = action
+
+    def as_row(self):
+        return {
+            "VM": self.vm_name,
+            "Resource Group": self.resource_group,
+            "Action": self.action.title(),
+            "Status": self.status,
+            "Attempts": self.attempts,
+            "Elapsed (s)": round(self.elapsed),
+            "Error": self.error or "",
+        }
+
+
+# VM start/stop/restart operations, run in the background on the shared job pool
+class OperationQueue(JobQueue):
+    max_running = MAX_RUNNING_OPERATIONS
+
+    # Queue one operation; returns (job, queued). A VM that already has an
+    # unfinished job keeps it instead of getting a second, conflicting one:
+    # that job is returned with queued False and the action is skipped.
+    def submit(self, subscription_id, resource_group, vm_name, action):
+        return self._submit([(subscription_id, resource_group, vm_name)], action)[0]
+
+    # Queue the same action for many (subscription_id, resource_group, vm_name)
+    # targets; returns (queued jobs, busy jobs that made their VM be skipped)
+    def submit_many(self, targets, action):
+        results = self._submit(targets, action)
+        return [job for job, queued in results if queued], [job for job, queued in results if not queued]
+
+    def _submit(self, targets, action):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown VM action: {action}")
+        return self.submit_batch(
+            targets, lambda job_id, *target: VmOperation(job_id, *target, action), MAX_CONCURRENT_OPERATIONS)
+
+    # Inside the retry so a credential or transport error fails the job instead of leaving it queued
+    def perform(self, job):
+        compute_client = get_client(ComputeManagementClient, job.subscription_id)
+        getattr(compute_client.virtual_machines, ACTIONS[job.action])(job.resource_group, job.vm_name).result()
@@ -0,0 +1,78 @@
+import hashlib
+import os
+import pickle
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+CACHE_FOLDER = "vuln_data"
+
+# Arrow-backed strings are far smaller than Python objects when pyarrow is there
+STRING_DTYPE = pd.StringDtype("pyarrow") if HAS_PYARROW else pd.StringDtype()
+
+REQUIRED_COLUMNS = ["IP", "DNS", "Server Owner", "Support Team"]
+# Few distinct values repeated over many rows: stored once per value as categories
+CATEGORICAL_COLUMNS = ["Server Owner", "Support Team"]
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Required columns with compact dtypes: owner/team as categories, the rest as strings
+def normalize_frame(df, columns=REQUIRED_COLUMNS):
+    missing_cols = [c for c in columns if c not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Excel missing columns: {missing_cols}")
+    df = df[columns].copy()
+    for column in columns:
+        if column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype("category")
+        else:
+            df[column] = df[column].astype(STRING_DTYPE)
+    return df
+
+
+# Write frames (an iterable of chunks with the same columns) as one parquet
+# file, chunk by chunk so memory stays at one chunk; pickle when pyarrow is missing
+def write_columnar(frames, path):
+    tmp_path = path + ".tmp"
+    if HAS_PYARROW:
+        writer = None
+        try:
+            for frame in frames:
+                table = pa.Table.from_pandas(frame.astype(STRING_DTYPE), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            return False
+    else:
+        frames = list(frames)
+        if not frames:
+            return False
+        with open(tmp_path, "wb") as f:
+            pickle.dump(pd.concat(frames, ignore_index=True), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return True
+
+
+# Read only the given columns back, owner/team as categories
+def read_columnar(path, columns=REQUIRED_COLUMNS):
+    if HAS_PYARROW:
+        return normalize_frame(pd.read_parquet(path, columns=columns), columns)
+    with open(path, "rb") as f:
+        return normalize_frame(pickle.load(f), columns)
+
@@ -0,0 +1,251 @@
+import glob
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from sqlite_store import connect, create_store
+from vulnerability_cache import CACHE_FOLDER, REQUIRED_COLUMNS, file_hash, read_columnar, write_columnar
+
+# Scanner exports dropped here are merged into the dataset the page reads
+EXPORTS_FOLDER = "VULF"
+EXPORT_PATTERNS = ["*.csv", "*.xlsx"]
+
+DATASET_PATH = os.path.join(CACHE_FOLDER, "vulnerabilities.db")
+SNAPSHOT_PATH = os.path.join(CACHE_FOLDER, "vulnerabilities.parquet")
+
+# Rows read, de-duplicated and written per step; bounds memory whatever the export size
+CHUNK_ROWS = 50_000
+
+# Export columns that identify a finding, first one present wins
+FINDING_COLUMNS = ["Finding", "Vulnerability", "Plugin ID", "QID", "CVE", "Title"]
+DATASET_COLUMNS = REQUIRED_COLUMNS + ["Finding"]
+# What makes a row unique for one IP: the finding, or a hash of the whole
+# row where an export has no finding column (or leaves it blank)
+KEY_COLUMN = "Key"
+
+# Bump when the tables change; the dataset is then rebuilt from the exports
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_files (
+    source_id INTEGER PRIMARY KEY AUTOINCREMENT,  -- grows with every ingest, so later exports win
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    ip TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    source_id INTEGER NOT NULL,
+    finding TEXT NOT NULL,
+    dns TEXT,
+    owner TEXT,
+    team TEXT,
+    PRIMARY KEY (ip, row_key, source_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS findings_source ON findings (source_id);
+"""
+
+
+# {dataset column: position in the header}, matching names case-insensitively
+def select_columns(header, path):
+    positions = {str(name).strip().lower(): position for position, name in reversed(list(enumerate(header)))}
+    selected = {column: positions.get(column.lower()) for column in REQUIRED_COLUMNS}
+    missing_cols = [column for column, position in selected.items() if position is None]
+    if missing_cols:
+        raise ValueError(f"{os.path.basename(path)} missing columns: {missing_cols}")
+    finding = next((positions[c.lower()] for c in FINDING_COLUMNS if c.lower() in positions), None)
+    if finding is not None:
+        selected["Finding"] = finding
+    return selected
+
+
+def _read_csv_chunks(path, chunk_rows):
+    header = pd.read_csv(path, nrows=0).columns
+    selected = select_columns(header, path)
+    names = {header[position]: column for column, position in selected.items()}
+    for chunk in pd.read_csv(path, usecols=list(selected.values()), dtype=str,
+                             keep_default_na=False, chunksize=chunk_rows):
+        yield chunk.rename(columns=names)
+
+
+# openpyxl's read-only mode streams rows from the sheet XML instead of
+# building the whole workbook in memory
+def _read_xlsx_chunks(path, chunk_rows):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        selected = select_columns(next(rows, ()), path)
+        batch = []
+        for row in rows:
+            batch.append([row[position] if position < len(row) else None for position in selected.values()])
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=list(selected))
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=list(selected))
+    finally:
+        workbook.close()
+
+
+def _row_hash(values):
+    return hashlib.blake2b("\x1f".join(values).encode(), digest_size=12).hexdigest()
+
+
+# Chunks of an export with the dataset columns, as strings, plus KEY_COLUMN
+def read_export(path, chunk_rows=CHUNK_ROWS):
+    reader = _read_xlsx_chunks if path.lower().endswith(".xlsx") else _read_csv_chunks
+    for chunk in reader(path, chunk_rows):
+        if "Finding" not in chunk.columns:
+            chunk["Finding"] = ""
+        chunk = chunk[DATASET_COLUMNS].fillna("").astype(str).apply(lambda column: column.str.strip())
+        chunk = chunk[chunk["IP"] != ""]
+        chunk[KEY_COLUMN] = [finding or _row_hash(row) for finding, row in zip(
+            chunk["Finding"].tolist(), chunk[REQUIRED_COLUMNS].itertuples(index=False, name=None))]
+        yield chunk
+
+
+# De-duplicated vulnerability findings merged from every export. Rows are
+# stored per export in SQLite, keyed by (IP, finding), so merging never
+# needs more than one chunk in memory; where exports share a key, the one
+# ingested last wins. Files are remembered by size/mtime (and hash), so
+# only new or changed exports are read, and an export that is changed or
+# deleted takes its old rows with it. The page reads a parquet snapshot.
+class VulnerabilityDataset:
+    def __init__(self, path=DATASET_PATH, snapshot_path=SNAPSHOT_PATH):
+        create_store(path)
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self._ingest_lock = threading.Lock()
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS findings")
+                conn.execute("DROP TABLE IF EXISTS ingested_files")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(SCHEMA)
+
+    # The dataset can always be rebuilt from the exports, so commits skip the full fsync
+    def _connect(self):
+        return connect(self.path, durable=False)
+
+    def _known_files(self):
+        with self._connect() as conn:
+            return {path: (size, mtime, sha256) for path, size, mtime, sha256
+                    in conn.execute("SELECT path, size, mtime, sha256 FROM ingested_files")}
+
+    # Exports in the folder that are new or changed since they were ingested, oldest first
+    def pending_files(self, folder=EXPORTS_FOLDER):
+        paths = [path for pattern in EXPORT_PATTERNS for path in glob.glob(os.path.join(folder, pattern))
+                 if not os.path.basename(path).startswith("~$")]
+        known = self._known_files()
+        pending, touched = [], []
+        for path in sorted(paths, key=os.path.getmtime):
+            stat = os.stat(path)
+            entry = known.get(os.path.abspath(path))
+            if entry is None or entry[0] != stat.st_size:
+                pending.append(path)
+            elif entry[1] != stat.st_mtime_ns:
+                if entry[2] != file_hash(path):
+                    pending.append(path)
+                else:
+                    touched.append((stat.st_mtime_ns, os.path.abspath(path)))
+        # Same content under a new mtime: remember it so the file is not hashed
+        # again (skipped while an ingest holds the write lock)
+        if touched:
+            try:
+                with self._connect() as conn:
+                    conn.executemany("UPDATE ingested_files SET mtime = ? WHERE path = ?", touched)
+            except sqlite3.OperationalError:
+                pass
+        return pending
+
+    # Ingested exports that are no longer on disk
+    def missing_files(self):
+        return [path for path in self._known_files() if not os.path.exists(path)]
+
+    # Bring the dataset in line with the folder: drop the rows of deleted
+    # exports and stream in new or changed ones, then rewrite the snapshot.
+    # Pending files are worked out under the lock, so two sessions never
+    # ingest the same export twice. Returns {"files", "rows", "removed", "errors"};
+    # on_progress(path, rows_read) is called after every chunk.
+    def sync(self, folder=EXPORTS_FOLDER, on_progress=None):
+        report = {"files": 0, "rows": 0, "removed": 0, "errors": {}}
+        with self._ingest_lock:
+            removed = self.missing_files()
+            if removed:
+                with self._connect() as conn:
+                    for path in removed:
+                        self._forget(conn, path)
+                report["removed"] = len(removed)
+            for path in self.pending_files(folder):
+                try:
+                    report["rows"] += self._ingest_file(path, on_progress)
+                    report["files"] += 1
+                # A corrupt or half-written export (bad zip, unreadable sheet,
+                # missing columns) is reported and skipped, never fatal
+                except Exception as e:
+                    report["errors"][path] = e
+            if report["files"] or report["removed"] or not os.path.exists(self.snapshot_path):
+                self.write_snapshot()
+        return report
+
+    # Remove an export's rows and its record
+    def _forget(self, conn, path):
+        row = conn.execute("SELECT source_id FROM ingested_files WHERE path = ?", (path,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM findings WHERE source_id = ?", row)
+            conn.execute("DELETE FROM ingested_files WHERE source_id = ?", row)
+
+    # One transaction per export: its previous rows are replaced, and a
+    # failure part way through leaves the dataset as it was
+    def _ingest_file(self, path, on_progress):
+        stat = os.stat(path)
+        abs_path = os.path.abspath(path)
+        rows = 0
+        with self._connect() as conn:
+            self._forget(conn, abs_path)
+            source_id = conn.execute(
+                "INSERT INTO ingested_files (path, size, mtime, sha256, rows, ingested_at) VALUES (?, ?, ?, '', 0, ?)",
+                (abs_path, stat.st_size, stat.st_mtime_ns, time.time())).lastrowid
+            for chunk in read_export(path):
+                # Key order keeps the inserts local in the primary key B-tree
+                chunk = chunk.sort_values(["IP", KEY_COLUMN], kind="stable")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO findings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    zip(chunk["IP"].tolist(), chunk[KEY_COLUMN].tolist(), [source_id] * len(chunk),
+                        chunk["Finding"].tolist(), chunk["DNS"].tolist(),
+                        chunk["Server Owner"].tolist(), chunk["Support Team"].tolist()))
+                rows += len(chunk)
+                if on_progress:
+                    on_progress(path, rows)
+            conn.execute("UPDATE ingested_files SET sha256 = ?, rows = ? WHERE source_id = ?",
+                         (file_hash(path), rows, source_id))
+        return rows
+
+    # The newest export's row for every key, chunk by chunk
+    def _chunks(self, chunk_rows=CHUNK_ROWS):
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                SELECT ip, dns, owner, team, finding FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY ip, row_key ORDER BY source_id DESC) AS newest
+                    FROM findings)
+                WHERE newest = 1""")
+            while rows := cursor.fetchmany(chunk_rows):
+                yield pd.DataFrame(rows, columns=DATASET_COLUMNS)
+
+    # Rewrite the parquet snapshot from the dataset, one chunk at a time
+    def write_snapshot(self):
+        if not write_columnar(self._chunks(), self.snapshot_path):
+            write_columnar([pd.DataFrame(columns=DATASET_COLUMNS)], self.snapshot_path)
+
+    def load(self):
+        return read_columnar(self.snapshot_path, DATASET_COLUMNS)
+
+    def row_count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM (SELECT DISTINCT ip, row_key FROM findings)").fetchone()[0]
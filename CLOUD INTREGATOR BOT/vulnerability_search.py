@@ -0,0 +1,166 @@
+import ipaddress
+import socket
+from bisect import bisect_left, bisect_right
+import numpy as np
+import pandas as pd
+
+# Categorical columns searched by (fuzzy) name
+NAME_COLUMNS = ["Server Owner", "Support Team"]
+
+# Trigram similarity (Dice coefficient) below this is not a match
+MIN_SIMILARITY = 0.35
+
+# Scores: exact value, value starting with the query, query found inside the value;
+# fuzzy matches score their similarity (below 1)
+EXACT, PREFIX, SUBSTRING = 3.0, 2.0, 1.5
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Dotted IPv4 strings to integers, -1 where a value is not an IPv4 address
+def ipv4_to_int(values):
+    numbers = np.full(len(values), -1, dtype=np.int64)
+    for position, value in enumerate(values):
+        try:
+            numbers[position] = int.from_bytes(socket.inet_pton(socket.AF_INET, value.strip()), "big")
+        except (OSError, AttributeError):
+            pass
+    return numbers
+
+
+# Fuzzy lookup over the distinct values of a column: substring matches first,
+# then values sharing enough trigrams with the query (tolerates typos)
+class TrigramIndex:
+    def __init__(self, values):
+        self.values = list(values)
+        self._lower = [value.lower() for value in self.values]
+        self._postings = {}
+        self._sizes = np.zeros(len(self.values), dtype=np.int32)
+        for value_id, value in enumerate(self._lower):
+            grams = trigrams(value)
+            self._sizes[value_id] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(value_id)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in self._postings.items()}
+
+    # {value_id: score} for values matching the query
+    def search(self, query, min_similarity=MIN_SIMILARITY):
+        query = query.strip().lower()
+        if not query:
+            return {}
+        scores = {}
+        for value_id, value in enumerate(self._lower):
+            if query in value:
+                scores[value_id] = EXACT if value == query else PREFIX if value.startswith(query) else SUBSTRING
+
+        grams = trigrams(query)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        if postings and len(query) >= 3:
+            ids, shared = np.unique(np.concatenate(postings), return_counts=True)
+            similarity = 2 * shared / (len(grams) + self._sizes[ids])
+            for value_id, score in zip(ids[similarity >= min_similarity], similarity[similarity >= min_similarity]):
+                scores.setdefault(int(value_id), float(score))
+        return scores
+
+
+# Search index over a vulnerability sheet, built once per loaded sheet.
+# Owner and team are matched fuzzily over their distinct values, DNS names
+# by prefix or suffix through sorted name lists, and IPs by address or CIDR
+# range through a sorted integer array. Every lookup returns row positions
+# without scanning the frame.
+class VulnerabilitySearch:
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        # One contiguous buffer per string column; row lookups on the chunked
+        # arrays parquet hands back are many times slower
+        for column in self.df.columns:
+            if column not in NAME_COLUMNS:
+                self.df[column] = pd.array(self.df[column].to_numpy(dtype=object), dtype=self.df[column].dtype)
+        self._names = {}
+        for column in NAME_COLUMNS:
+            values = self.df[column].astype("category")
+            codes = values.cat.codes.to_numpy()
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(values.cat.categories) + 1))
+            index = TrigramIndex(str(category) for category in values.cat.categories)
+            self._names[column] = (index, order, bounds)
+
+        dns = self.df["DNS"].fillna("").astype(str).str.lower().to_numpy(dtype=object)
+        self._dns_order = np.argsort(dns, kind="stable")
+        self._dns_sorted = dns[self._dns_order].tolist()
+        reversed_dns = np.asarray([name[::-1] for name in dns], dtype=object)
+        self._rdns_order = np.argsort(reversed_dns, kind="stable")
+        self._rdns_sorted = reversed_dns[self._rdns_order].tolist()
+
+        ips = ipv4_to_int(self.df["IP"].to_numpy(dtype=object))
+        self._ip_order = np.argsort(ips, kind="stable")
+        self._ip_sorted = ips[self._ip_order]
+
+    # (score, rows) for every owner or team value matching the query
+    def _name_matches(self, column, query):
+        index, order, bounds = self._names[column]
+        return [(score, order[bounds[value_id]:bounds[value_id + 1]])
+                for value_id, score in index.search(query).items()]
+
+    # Rows whose DNS name starts with the query
+    def dns_prefix(self, prefix):
+        prefix = prefix.lower()
+        lo = bisect_left(self._dns_sorted, prefix)
+        hi = bisect_right(self._dns_sorted, prefix + "\uffff")
+        return self._dns_order[lo:hi]
+
+    # Rows whose DNS name ends with the suffix ("corp.net" or ".corp.net")
+    def dns_suffix(self, suffix):
+        suffix = suffix.lower().lstrip("*")[::-1]
+        lo = bisect_left(self._rdns_sorted, suffix)
+        hi = bisect_right(self._rdns_sorted, suffix + "\uffff")
+        return self._rdns_order[lo:hi]
+
+    # Rows whose IP is the address or falls inside the CIDR range
+    def ip_range(self, network):
+        network = ipaddress.ip_network(network.strip(), strict=False)
+        if network.version != 4:
+            return np.empty(0, dtype=np.int64)
+        lo = np.searchsorted(self._ip_sorted, int(network.network_address), side="left")
+        hi = np.searchsorted(self._ip_sorted, int(network.broadcast_address), side="right")
+        return self._ip_order[lo:hi]
+
+    # Ranked rows for free text: an IP or CIDR, a DNS suffix (".corp.net"),
+    # or a name matched against owner, team and DNS prefix. Adds a Score column.
+    def search(self, query, limit=None):
+        query = query.strip()
+        groups = []
+        if query:
+            try:
+                if not query[0].isdigit() or "." not in query:
+                    raise ValueError(query)
+                groups.append((EXACT, self.ip_range(query)))
+            except ValueError:
+                if query.startswith((".", "*.")):
+                    groups.append((EXACT, self.dns_suffix(query)))
+                else:
+                    for column in NAME_COLUMNS:
+                        groups += self._name_matches(column, query)
+                    groups.append((PREFIX, self.dns_prefix(query)))
+
+        # Walk the groups best score first, keeping each row once, and stop at the limit
+        # so a vague query never materializes the whole sheet
+        seen = np.zeros(len(self.df), dtype=bool)
+        positions, scores, found = [], [], 0
+        for score, rows in sorted(groups, key=lambda group: -group[0]):
+            rows = rows[~seen[rows]]
+            if limit is not None:
+                rows = rows[:limit - found]
+            seen[rows] = True
+            positions.append(rows)
+            scores.append(np.full(len(rows), score))
+            found += len(rows)
+            if limit is not None and found >= limit:
+                break
+
+        positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+        scores = np.concatenate(scores) if scores else np.empty(0)
+        return self.df.iloc[positions].assign(Score=np.round(scores, 2))